@@ -1,8 +1,11 @@
 import discord
 from discord import app_commands
-from app.config import CHANNEL_ID, GUILD_ID, SOURCES
+from app.config import CHANNEL_ID, GUILD_ID
 from app.services.database import add_url
-from app.utils.url_utils import extract_source
+from app.services.scrapers.registry import registry
+from app.services.logger import get_logger
+
+logger = get_logger("add_command")
 
 
 @app_commands.guilds(discord.Object(id=GUILD_ID))
@@ -10,7 +13,8 @@ from app.utils.url_utils import extract_source
     name="add",
     description="Add a URL for a given source. If source is empty, it will be extracted from the URL."
 )
-async def add(interaction: discord.Interaction, url: str):
+@app_commands.describe(flag="Poll this product more often and scrape it first in each cycle.")
+async def add(interaction: discord.Interaction, url: str, flag: bool = False):
     """Slash command to add a URL document to MongoDB for a given source."""
     if int(interaction.channel_id) != int(CHANNEL_ID):
         await interaction.response.send_message(
@@ -19,20 +23,23 @@ async def add(interaction: discord.Interaction, url: str):
         )
         return
 
-    source = extract_source(url)
-    if source is None or source not in SOURCES:
+    scraper = registry.for_url(url)
+    if scraper is None:
         await interaction.response.send_message(
-            "Invalid source provided. Please use one of the following: Falabella, Paris or SP Digital. More sources will be supported soon.",
+            "Invalid source provided. Please use one of the following: "
+            f"{', '.join(registry.sources())}. More sources will be supported soon.",
             ephemeral=True
         )
         return
 
-    added = add_url(source, url)
-    print(f"URL Added: {added}")
+    source = scraper.source_name
+
+    added = await add_url(source, url, priority=1 if flag else 0)
+    logger.debug("URL added: %s (%s)", url, added)
     if added:
         embed = discord.Embed(
             title="URL Added",
-            description=f"Source: **{source}**\nURL: **{url}**",
+            description=f"Source: **{source}**\nURL: **{url}**" + ("\nFlagged: **Yes**" if flag else ""),
             color=0x00ff00
         )
     else:
@@ -1,23 +1,44 @@
+import time
+from typing import Optional
 import discord
 from discord import app_commands
-from app.config import CHANNEL_ID, GUILD_ID, SOURCES, PARIS_LABELS, FALABELLA_LABELS, SPDIGITAL_LABELS
-from app.services.scrapers.falabella_scraper import FalabellaScraper
-from app.services.scrapers.paris_scraper import ParisScraper
-from app.services.scrapers.spdigital_scraper import SpDigitalScraper
-from app.utils.price_comparer import create_embed_for_url
-from app.services.database import get_urls_by_source
+from app.config import CHANNEL_ID, GUILD_ID
+from app.services.scrapers.registry import registry
+from app.utils.price_comparer import get_comparison_targets, iter_comparison_embeds
+from app.services.scrapers.scrape_cache import scrape_cache
+from app.services.scrapers.admission import browser_admission
+from app.services.database import flush_price_writes
+from app.services.notification_dispatcher import notification_dispatcher
 from app.services.logger import get_logger
-import asyncio
 
 logger = get_logger("compare_command")
 
+# Minimum seconds between progress edits.
+UPDATE_INTERVAL = 3.0
+
+
+def progress_text(done: int, failed: int, total: int, source: Optional[str], finished: bool = False) -> str:
+    scope = f"{source} URLs" if source else "URLs"
+    pending = total - done - failed
+    if finished:
+        return f"✅ Compared {done} of {total} {scope}, {failed} failed."
+    return f"⏳ Comparing {total} {scope}: {done} done, {pending} pending, {failed} failed."
+
 
 @app_commands.guilds(discord.Object(id=GUILD_ID))
 @app_commands.command(
     name="compare",
     description="Compare prices for all stored URLs and notify if price has changed."
 )
-async def compare(interaction: discord.Interaction):
+@app_commands.describe(
+    force="Scrape every product again instead of reusing results from the last few minutes.",
+    source="Only compare the URLs of this retailer."
+)
+@app_commands.choices(source=[
+    app_commands.Choice(name=scraper.source_name, value=scraper.source) for scraper in registry
+][:25])
+async def compare(interaction: discord.Interaction, force: bool = False,
+                  source: Optional[app_commands.Choice[str]] = None):
     if int(interaction.channel_id) != int(CHANNEL_ID):
         await interaction.response.send_message(
             "This command can only be used in the designated channel.",
@@ -25,33 +46,38 @@ async def compare(interaction: discord.Interaction):
         )
         return
 
-    await interaction.response.send_message("Comparing prices, this may take a moment...")
-
-    scraper_mapping = {
-        "paris": (ParisScraper(), PARIS_LABELS),
-        "falabella": (FalabellaScraper(), FALABELLA_LABELS),
-        "spdigital": (SpDigitalScraper(), SPDIGITAL_LABELS)
-    }
+    await interaction.response.defer(thinking=True)
+    source_name = source.name if source else None
+    targets = await get_comparison_targets(source.value if source else None)
+    if not targets:
+        await interaction.followup.send("No URLs to compare.")
+        return
 
+    # Progress lives in a channel message edited with the bot token, which
+    # unlike the interaction token does not expire after 15 minutes.
     channel = interaction.channel
-    tasks = []
-
-    for source in SOURCES:
-        scraper, labels = scraper_mapping[source.lower()]
-        urls = get_urls_by_source(source)
+    progress = await channel.send(progress_text(0, 0, len(targets), source_name))
+    await interaction.followup.send(f"Comparing {len(targets)} URLs, progress: {progress.jump_url}")
 
-        for url in urls:
-            tasks.append(create_embed_for_url(
-                source, url, scraper, labels, interaction.client))
+    done = failed = 0
+    last_update = time.monotonic()
+    async for _, embed in iter_comparison_embeds(targets, interaction.client, force):
+        if embed is None:
+            failed += 1
+        else:
+            done += 1
+            # Batched into messages of up to 10 embeds by the dispatcher.
+            notification_dispatcher.submit(channel, embed)
 
-    embeds = await asyncio.gather(*tasks, return_exceptions=True)
+        if time.monotonic() - last_update >= UPDATE_INTERVAL:
+            await progress.edit(content=progress_text(done, failed, len(targets), source_name))
+            last_update = time.monotonic()
 
-    total_sent = 0
-    for embed in embeds:
-        if isinstance(embed, discord.Embed):
-            await channel.send(embed=embed)
-            total_sent += 1
-            await asyncio.sleep(0.2)
+    await notification_dispatcher.flush()
+    await progress.edit(content=progress_text(done, failed, len(targets), source_name, finished=True))
+    await flush_price_writes()
 
-    if total_sent == 0:
-        await channel.send("No URLs to compare or no changes detected.")
+    logger.info("/compare finished: %d compared, %d failed.", done, failed)
+    logger.info("Scrape cache after /compare: %s", scrape_cache.stats())
+    logger.info("Browser admission after /compare: %s", browser_admission.stats())
+    logger.info("Notification dispatcher after /compare: %s", notification_dispatcher.stats())
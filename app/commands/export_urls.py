@@ -0,0 +1,40 @@
+import csv
+import datetime
+import io
+from typing import Optional
+import discord
+from discord import app_commands
+from app.config import CHANNEL_ID, GUILD_ID
+from app.commands.url_pages import source_choices
+from app.services.database import iter_tracked_urls
+
+EXPORT_FIELDS = ("source", "url", "added_at", "last_scraped_at", "last_changed_at", "priority")
+
+
+def _cell(value) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return "" if value is None else str(value)
+
+
+@app_commands.guilds(discord.Object(id=GUILD_ID))
+@app_commands.command(name="export", description="Download the tracked URLs as a CSV file that /import accepts.")
+@app_commands.describe(source="Only export the URLs of this retailer.")
+@app_commands.choices(source=source_choices())
+async def export_urls(interaction: discord.Interaction, source: Optional[app_commands.Choice[str]] = None):
+    if int(interaction.channel_id) != int(CHANNEL_ID):
+        await interaction.response.send_message("This command can only be used in the designated channel.", ephemeral=True)
+        return
+
+    await interaction.response.defer(thinking=True)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    async for doc in iter_tracked_urls(source.value if source else None):
+        writer.writerow([_cell(doc.get(field)) for field in EXPORT_FIELDS])
+        count += 1
+
+    name = f"urls-{source.value.lower() if source else 'all'}-{datetime.date.today().isoformat()}.csv"
+    file = discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename=name)
+    await interaction.followup.send(f"Exported {count} URLs.", file=file)
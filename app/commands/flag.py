@@ -0,0 +1,31 @@
+import discord
+from discord import app_commands
+from app.config import CHANNEL_ID, GUILD_ID
+from app.services.database import set_url_priority
+from app.services.polling import polling_policy
+
+
+@app_commands.guilds(discord.Object(id=GUILD_ID))
+@app_commands.command(name="flag", description="Flag a tracked URL so it is polled more often, or clear the flag.")
+@app_commands.describe(url="A tracked product URL.", flagged="Set to False to poll the URL at its normal rate again.")
+async def flag(interaction: discord.Interaction, url: str, flagged: bool = True):
+    if int(interaction.channel_id) != int(CHANNEL_ID):
+        await interaction.response.send_message("This command can only be used in the designated channel.", ephemeral=True)
+        return
+
+    if not await set_url_priority(url, 1 if flagged else 0):
+        await interaction.response.send_message(f"URL is not tracked: {url}", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="URL Flagged" if flagged else "URL Flag Cleared",
+        description=f"URL: **{url}**\n" + (
+            f"Scraped first in each cycle and polled at least every {polling_policy.flagged_interval / 60:.0f} minutes."
+            if flagged else "Polled at its normal, change-driven interval again."),
+        color=0xf1c40f if flagged else 0x95a5a6
+    )
+    embed.set_footer(
+        text=f"Generated by {interaction.client.user.name}",
+        icon_url=interaction.client.user.display_avatar.url
+    )
+    await interaction.response.send_message(embed=embed)
@@ -0,0 +1,70 @@
+import discord
+from discord import app_commands
+from app.config import CHANNEL_ID, GUILD_ID
+from app.services.database import add_urls, flush_price_writes
+from app.services.scrapers.registry import registry
+from app.utils.price_comparer import iter_comparison_embeds
+from app.utils.url_import import plan_import
+from app.services.logger import get_logger
+
+logger = get_logger("import_command")
+
+MAX_IMPORT_BYTES = 1024 * 1024
+# Invalid entries listed back to the user; an embed field holds 1024 characters.
+MAX_INVALID_SHOWN = 10
+
+
+@app_commands.guilds(discord.Object(id=GUILD_ID))
+@app_commands.command(name="import", description="Add every URL in a CSV or text file.")
+@app_commands.describe(
+    file="CSV or text file with URLs, e.g. one per line or a file from /export.",
+    scrape="Scrape the new URLs right away to record their first prices."
+)
+async def import_urls(interaction: discord.Interaction, file: discord.Attachment, scrape: bool = False):
+    if int(interaction.channel_id) != int(CHANNEL_ID):
+        await interaction.response.send_message("This command can only be used in the designated channel.", ephemeral=True)
+        return
+    if file.size > MAX_IMPORT_BYTES:
+        await interaction.response.send_message(
+            f"The file is too large, the limit is {MAX_IMPORT_BYTES // 1024} KB.", ephemeral=True)
+        return
+
+    await interaction.response.defer(thinking=True)
+    plan = plan_import((await file.read()).decode("utf-8-sig", errors="replace"))
+    added = await add_urls(plan.entries)
+    duplicates = len(plan.duplicates) + len(plan.entries) - len(added)
+    logger.info("Imported %s: %d added, %d duplicates, %d invalid.",
+                file.filename, len(added), duplicates, len(plan.invalid))
+
+    embed = discord.Embed(title="URL Import", description=f"File: **{file.filename}**", color=0x00ff00)
+    embed.add_field(name="Added", value=str(len(added)))
+    embed.add_field(name="Duplicates", value=str(duplicates))
+    embed.add_field(name="Invalid", value=str(len(plan.invalid)))
+    if plan.invalid:
+        shown = "\n".join(url[:90] for url in plan.invalid[:MAX_INVALID_SHOWN])
+        more = len(plan.invalid) - MAX_INVALID_SHOWN
+        embed.add_field(
+            name="Invalid entries",
+            value=shown + (f"\n… and {more} more" if more > 0 else ""),
+            inline=False)
+        embed.add_field(name="Supported sources", value=", ".join(registry.sources()), inline=False)
+    embed.set_footer(
+        text=f"Generated by {interaction.client.user.name}",
+        icon_url=interaction.client.user.display_avatar.url
+    )
+    await interaction.followup.send(embed=embed)
+
+    if not (scrape and added):
+        return
+    # Same bounded path as /compare: scrape cache, browser admission and per-domain limits.
+    targets = [(registry.for_url(url), url) for url in added]
+    succeeded = failed = 0
+    async for _, result in iter_comparison_embeds(targets, interaction.client):
+        if result is None:
+            failed += 1
+        else:
+            succeeded += 1
+    await flush_price_writes()
+    # Sent with the bot token: the interaction token may have expired on a large import.
+    await interaction.channel.send(
+        f"First scrape of {len(added)} imported URLs: {succeeded} succeeded, {failed} failed.")
@@ -0,0 +1,63 @@
+import discord
+from discord import app_commands
+from app.config import CHANNEL_ID, GUILD_ID
+from app.services.database import cycle_checkpoints
+from app.services.scrapers.admission import browser_admission
+from app.services.notification_dispatcher import notification_dispatcher
+
+
+@app_commands.guilds(discord.Object(id=GUILD_ID))
+@app_commands.command(name="status", description="Show the progress of the current or last price watch cycle.")
+async def status(interaction: discord.Interaction):
+    if int(interaction.channel_id) != int(CHANNEL_ID):
+        await interaction.response.send_message("This command can only be used in the designated channel.", ephemeral=True)
+        return
+
+    cycle = await cycle_checkpoints.progress()
+    if cycle is None:
+        await interaction.response.send_message("No price watch cycle has run yet.", ephemeral=True)
+        return
+
+    total = cycle.get("total", 0)
+    completed = cycle.get("completed", 0)
+    percent = completed / total * 100 if total else 100.0
+    running = cycle.get("status") == "running"
+    state = "in progress" if running else "abandoned" if cycle.get("abandoned") else "finished"
+
+    embed = discord.Embed(
+        title=f"Price watch cycle {state}",
+        color=0xf1c40f if running else 0x2ecc71
+    )
+    embed.add_field(name="Cycle", value=str(cycle["_id"]), inline=False)
+    embed.add_field(name="Progress", value=f"{completed}/{total} URLs ({percent:.0f}%)")
+    embed.add_field(name="Failed", value=str(cycle.get("failed", 0)))
+    embed.add_field(name="Resumed", value=f"{cycle.get('resumes', 0)} times")
+    embed.add_field(name="Started", value=discord.utils.format_dt(cycle["started_at"], "R"))
+    if running:
+        embed.add_field(name="Last checkpoint", value=discord.utils.format_dt(cycle["updated_at"], "R"))
+    elif cycle.get("finished_at"):
+        embed.add_field(name="Finished", value=discord.utils.format_dt(cycle["finished_at"], "R"))
+    admission = browser_admission.stats()
+    embed.add_field(
+        name="Browser sessions",
+        value=f"{admission['in_flight']} running, {admission['waiting']} queued "
+              f"(peak {admission['peak_waiting']}), {admission['shed']} shed",
+        inline=False)
+    embed.add_field(
+        name="Memory",
+        value=f"{admission['used_mb']}/{admission['limit_mb']} MB (peak {admission['peak_used_mb']} MB), "
+              f"Chromium {admission['chromium_mb']} MB (peak {admission['peak_chromium_mb']} MB)",
+        inline=False)
+    dispatcher = notification_dispatcher.stats()
+    embed.add_field(
+        name="Notifications",
+        value=f"{dispatcher['messages']} messages for {dispatcher['embeds']} embeds, "
+              f"{dispatcher['coalesced']} coalesced, {dispatcher['pending']} pending, "
+              f"rate limited {dispatcher['rate_limited']} times ({dispatcher['rate_limited_s']}s)",
+        inline=False)
+    embed.set_footer(
+        text=f"Generated by {interaction.client.user.name}",
+        icon_url=interaction.client.user.display_avatar.url
+    )
+
+    await interaction.response.send_message(embed=embed)
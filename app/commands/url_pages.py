@@ -0,0 +1,167 @@
+import math
+from typing import List, Optional, Tuple
+import discord
+from discord import app_commands
+from app.config import URL_PAGE_SIZE
+from app.services.database import get_url_page, count_urls, delete_url, page_key
+from app.services.scrapers.registry import registry
+
+# Discord's limit on an embed description.
+MAX_DESCRIPTION_CHARS = 4096
+ALL_SOURCES = "*"
+
+
+def shorten(url: str, limit: int) -> str:
+    return url if len(url) <= limit else url[:limit - 1] + "…"
+
+
+def page_description(lines: List[Tuple[str, str]], page_size: int) -> str:
+    """
+    Joins (prefix, url) rows, shortening each URL to its share of the
+    description limit so a full page of `page_size` rows always fits.
+    """
+    row_chars = MAX_DESCRIPTION_CHARS // max(1, page_size) - 1
+    rows = [prefix + shorten(url, max(1, row_chars - len(prefix))) for prefix, url in lines]
+    return "\n".join(rows)[:MAX_DESCRIPTION_CHARS]
+
+
+class SourceFilter(discord.ui.Select):
+    def __init__(self, source: Optional[str]):
+        options = [discord.SelectOption(label="All sources", value=ALL_SOURCES, default=source is None)]
+        options += [
+            discord.SelectOption(label=name, value=name, default=name == source)
+            for name in registry.sources()
+        ][:24]
+        super().__init__(placeholder="Filter by source", options=options, row=0)
+
+    async def callback(self, interaction: discord.Interaction):
+        view: URLPageView = self.view
+        view.source = None if self.values[0] == ALL_SOURCES else self.values[0]
+        await view.first_page()
+        await view.show(interaction)
+
+
+class URLDelete(discord.ui.Select):
+    def __init__(self, docs: List[dict], offset: int):
+        self.docs = docs
+        options = [
+            discord.SelectOption(label=f"{offset + idx}. {doc['source']}", value=str(idx), description=doc["url"][:50])
+            for idx, doc in enumerate(docs, start=1)
+        ]
+        super().__init__(placeholder="Select a URL to delete", min_values=1, max_values=1, options=options, row=1)
+
+    async def callback(self, interaction: discord.Interaction):
+        doc = self.docs[int(self.values[0]) - 1]
+        await delete_url(doc["source"], doc["url"])
+        view: URLPageView = self.view
+        await view.reload()
+        await view.show(interaction)
+        await interaction.followup.send(f"URL deleted: {doc['url']}", ephemeral=True)
+
+
+class URLPageView(discord.ui.View):
+    """
+    Pages through tracked URLs, optionally of one source. Every page is read
+    with its own keyset query (see get_url_page) from the first or last URL
+    on screen, so no page loads the whole collection. With `deletable`, the
+    URLs on the page are offered in a select menu for deletion.
+    """
+
+    def __init__(self, source: Optional[str] = None, deletable: bool = False,
+                 page_size: int = URL_PAGE_SIZE, timeout=180):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.deletable = deletable
+        self.page_size = page_size
+        self.docs: List[dict] = []
+        self.page = 1
+        self.total = 0
+        self.has_previous = False
+        self.has_next = False
+
+    async def first_page(self) -> None:
+        self.docs, self.has_next = await get_url_page(self.source, limit=self.page_size)
+        self.page = 1
+        self.has_previous = False
+        self.total = await count_urls(self.source)
+
+    async def next_page(self) -> None:
+        docs, more = await get_url_page(self.source, page_key(self.docs[-1]), limit=self.page_size)
+        if not docs:
+            await self.reload()
+            return
+        self.docs, self.has_next = docs, more
+        self.page += 1
+        self.has_previous = True
+        self.total = await count_urls(self.source)
+
+    async def previous_page(self) -> None:
+        docs, more = await get_url_page(self.source, page_key(self.docs[0]), backward=True, limit=self.page_size)
+        if not more:
+            # Back at the start: page one is re-read in full even if URLs were added or deleted since.
+            await self.first_page()
+            return
+        self.docs, self.has_previous = docs, more
+        self.page = max(2, self.page - 1)
+        self.has_next = True
+        self.total = await count_urls(self.source)
+
+    async def reload(self) -> None:
+        "Re-reads the current page, e.g. after a deletion."
+        if not self.docs:
+            await self.first_page()
+            return
+        docs, more = await get_url_page(self.source, page_key(self.docs[0]), inclusive=True, limit=self.page_size)
+        if not docs:
+            await self.previous_page()
+            return
+        self.docs, self.has_next = docs, more
+        self.total = await count_urls(self.source)
+
+    def embed(self, client: discord.Client) -> discord.Embed:
+        offset = (self.page - 1) * self.page_size
+        lines = [(f"**{offset + idx}. {doc['source']}:** ", doc["url"]) for idx, doc in enumerate(self.docs, start=1)]
+        pages = max(1, math.ceil(self.total / self.page_size))
+        embed = discord.Embed(
+            title="Scraper Repository" + (f" · {self.source}" if self.source else ""),
+            description=page_description(lines, self.page_size) or "No URLs found.",
+            color=0x0000ff
+        )
+        embed.set_footer(
+            text=f"Page {min(self.page, pages)}/{pages} · {self.total} URLs · Generated by {client.user.name}",
+            icon_url=client.user.display_avatar.url
+        )
+        return embed
+
+    def refresh_items(self) -> None:
+        self.clear_items()
+        self.add_item(SourceFilter(self.source))
+        if self.deletable and self.docs:
+            self.add_item(URLDelete(self.docs, (self.page - 1) * self.page_size))
+        self.previous_button.disabled = not self.has_previous
+        self.next_button.disabled = not self.has_next
+        self.add_item(self.previous_button)
+        self.add_item(self.next_button)
+
+    async def show(self, interaction: discord.Interaction) -> None:
+        "Renders the current page, as a new message or in place of the one the interaction came from."
+        self.refresh_items()
+        embed = self.embed(interaction.client)
+        if interaction.type == discord.InteractionType.component:
+            await interaction.response.edit_message(embed=embed, view=self)
+        else:
+            await interaction.response.send_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, row=2)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.previous_page()
+        await self.show(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, row=2)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.next_page()
+        await self.show(interaction)
+
+
+def source_choices() -> list:
+    return [app_commands.Choice(name=name, value=name) for name in registry.sources()][:25]
@@ -1,4 +1,6 @@
+import json
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -65,6 +67,41 @@ if not MONGO_COLLECTION2:
     raise ValueError(
         "MONGO_COLLECTION2 environment variable or secret is not set.")
 
+# One document per tracked URL; MONGO_COLLECTION2 holds the legacy per-source arrays.
+MONGO_TRACKING_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_tracking_collection", "MONGO_TRACKING_COLLECTION") or "tracked_urls"
+
+# Price history: raw points in a time-series collection plus hourly/daily rollups.
+# Time-series collections need MongoDB 5.0+; on older servers price history is disabled.
+MONGO_PRICE_POINTS_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_price_points_collection", "MONGO_PRICE_POINTS_COLLECTION") or "price_points"
+MONGO_PRICE_ROLLUPS_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_price_rollups_collection", "MONGO_PRICE_ROLLUPS_COLLECTION") or "price_rollups"
+
+# Watcher cycle checkpoints, so a restart resumes the unfinished cycle.
+MONGO_CYCLES_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_cycles_collection", "MONGO_CYCLES_COLLECTION") or "watcher_cycles"
+CYCLE_CHECKPOINT_EVERY = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}cycle_checkpoint_every", "CYCLE_CHECKPOINT_EVERY") or 25)
+CYCLE_HISTORY_DAYS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}cycle_history_days", "CYCLE_HISTORY_DAYS") or 7)
+# A cycle resumed this many times (e.g. a URL that keeps crashing the container)
+# is abandoned so a fresh cycle can start.
+CYCLE_MAX_RESUMES = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}cycle_max_resumes", "CYCLE_MAX_RESUMES") or 3)
+
+# Leader lease documents and the outbox the leader sends notifications from.
+MONGO_LEASES_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_leases_collection", "MONGO_LEASES_COLLECTION") or "leases"
+MONGO_NOTIFICATIONS_COLLECTION = get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_notifications_collection", "MONGO_NOTIFICATIONS_COLLECTION") or "notification_outbox"
+PRICE_POINTS_RETENTION_DAYS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}price_points_retention_days", "PRICE_POINTS_RETENTION_DAYS") or 180)
+PRICE_HOURLY_RETENTION_DAYS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}price_hourly_retention_days", "PRICE_HOURLY_RETENTION_DAYS") or 730)
+PRICE_QUERY_MAX_TIME_MS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}price_query_max_time_ms", "PRICE_QUERY_MAX_TIME_MS") or 2_000)
+
 CLIENT_ID = get_secret_or_env(f"{PROJECT_PREFIX}client_id", "CLIENT_ID")
 if not CLIENT_ID:
     raise ValueError("CLIENT_ID environment variable or secret is not set.")
@@ -96,34 +133,150 @@ LOG_LEVEL = get_secret_or_env(
 if LOG_LEVEL not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
     raise ValueError("Invalid LOG_LEVEL environment variable or secret.")
 
-# Labels for logging each field per source.
-PRODUCT_NAME = "Product Name"
-TIMESTAMP_LABEL = "Timestamp"
-NORMAL_PRICE = "Normal Price"
-PARIS_LABELS = {
-    "name": PRODUCT_NAME,
-    "price1": "Cencosud Price",
-    "price2": "Internet Price",
-    "price3": NORMAL_PRICE,
-    "timestamp": TIMESTAMP_LABEL
-}
+# Browser pool shared by every Playwright-backed scraper.
+BROWSER_POOL_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_pool_size", "BROWSER_POOL_SIZE") or 2)
+BROWSER_MAX_PAGES = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_max_pages", "BROWSER_MAX_PAGES") or 100)
+# Seconds shutdown waits for in-flight pages before closing their browsers anyway.
+BROWSER_CLOSE_TIMEOUT = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_close_timeout", "BROWSER_CLOSE_TIMEOUT") or 30)
+
+# Admission control for browser sessions, from the container memory limit and
+# the RSS of Chromium processes. Fractions are of the memory limit.
+BROWSER_MEMORY_TARGET = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_memory_target", "BROWSER_MEMORY_TARGET") or 0.75)
+BROWSER_MEMORY_CRITICAL = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_memory_critical", "BROWSER_MEMORY_CRITICAL") or 0.9)
+BROWSER_SESSION_MEMORY_MB = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_session_memory_mb", "BROWSER_SESSION_MEMORY_MB") or 300)
+BROWSER_ADMISSION_MAX_QUEUE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_admission_max_queue", "BROWSER_ADMISSION_MAX_QUEUE") or 200)
+BROWSER_ADMISSION_MAX_WAIT = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}browser_admission_max_wait", "BROWSER_ADMISSION_MAX_WAIT") or 300)
 
-FALABELLA_LABELS = {
-    "name": PRODUCT_NAME,
-    "price1": "CMR Price",
-    "price2": "Internet Price",
-    "price3": NORMAL_PRICE,
-    "timestamp": TIMESTAMP_LABEL
+# Plain HTTP fast path tried before falling back to the browser.
+HTTP_TIMEOUT = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}http_timeout", "HTTP_TIMEOUT") or 20)
+HTTP_MAX_CONNECTIONS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}http_max_connections", "HTTP_MAX_CONNECTIONS") or 20)
+
+# Per-domain politeness limits applied to every fetch.
+RATE_LIMIT_RPS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}rate_limit_rps", "RATE_LIMIT_RPS") or 0.5)
+RATE_LIMIT_BURST = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}rate_limit_burst", "RATE_LIMIT_BURST") or 2)
+RATE_LIMIT_CONCURRENCY = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}rate_limit_concurrency", "RATE_LIMIT_CONCURRENCY") or 2)
+DOMAIN_RATE_LIMITS = {
+    "paris.cl": {"rps": 0.5, "burst": 2, "concurrency": 2},
+    "falabella.com": {"rps": 0.3, "burst": 1, "concurrency": 1},
+    "spdigital.cl": {"rps": 0.5, "burst": 2, "concurrency": 2}
 }
+if RATE_LIMIT_RPS <= 0 or any(limits["rps"] <= 0 for limits in DOMAIN_RATE_LIMITS.values()):
+    raise ValueError("RATE_LIMIT_RPS and every domain's rps must be greater than 0.")
+
+# HTML parsing runs off the event loop: "process", "thread" or "inline".
+PARSE_EXECUTOR = get_secret_or_env(
+    f"{PROJECT_PREFIX}parse_executor", "PARSE_EXECUTOR") or "process"
+if PARSE_EXECUTOR not in ["process", "thread", "inline"]:
+    raise ValueError("Invalid PARSE_EXECUTOR environment variable or secret.")
+PARSE_WORKERS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}parse_workers", "PARSE_WORKERS") or 2)
+PARSE_MAX_TASKS_PER_WORKER = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}parse_max_tasks_per_worker", "PARSE_MAX_TASKS_PER_WORKER") or 200)
 
-SPDIGITAL_LABELS = {
-    "name": PRODUCT_NAME,
-    "price1": NORMAL_PRICE,
-    "price2": "Transfer Payment Price",
-    "price3": "Other Payment Methods Price",
-    "timestamp": TIMESTAMP_LABEL
+# Worker counts for each stage of the price watcher pipeline.
+WATCHER_WORKERS = {
+    "fetch": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_fetch_workers", "WATCHER_FETCH_WORKERS") or 6),
+    "detect": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_detect_workers", "WATCHER_DETECT_WORKERS") or 2),
+    "parse": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_parse_workers", "WATCHER_PARSE_WORKERS") or 2),
+    "compare": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_compare_workers", "WATCHER_COMPARE_WORKERS") or 2),
+    "store": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_store_workers", "WATCHER_STORE_WORKERS") or 1),
+    "notify": int(get_secret_or_env(
+        f"{PROJECT_PREFIX}watcher_notify_workers", "WATCHER_NOTIFY_WORKERS") or 1)
 }
 
+# Async MongoDB client pool and timeouts.
+MONGO_MAX_POOL_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_max_pool_size", "MONGO_MAX_POOL_SIZE") or 20)
+MONGO_MIN_POOL_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_min_pool_size", "MONGO_MIN_POOL_SIZE") or 2)
+MONGO_CONNECT_TIMEOUT_MS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_connect_timeout_ms", "MONGO_CONNECT_TIMEOUT_MS") or 10_000)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_server_selection_timeout_ms", "MONGO_SERVER_SELECTION_TIMEOUT_MS") or 10_000)
+MONGO_SOCKET_TIMEOUT_MS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}mongo_socket_timeout_ms", "MONGO_SOCKET_TIMEOUT_MS") or 30_000)
+
+# Adaptive polling: the watcher ticks every POLL_TICK_MINUTES and scrapes the
+# URLs that are due; each URL's interval follows its observed change rate.
+POLL_TICK_MINUTES = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_tick_minutes", "POLL_TICK_MINUTES") or 15)
+POLL_MIN_INTERVAL_MINUTES = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_min_interval_minutes", "POLL_MIN_INTERVAL_MINUTES") or 30)
+POLL_MAX_INTERVAL_HOURS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_max_interval_hours", "POLL_MAX_INTERVAL_HOURS") or 48)
+POLL_DEFAULT_INTERVAL_HOURS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_default_interval_hours", "POLL_DEFAULT_INTERVAL_HOURS") or 2)
+POLL_BACKOFF = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_backoff", "POLL_BACKOFF") or 1.5)
+POLL_LOOKBACK_DAYS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_lookback_days", "POLL_LOOKBACK_DAYS") or 30)
+POLL_FLAGGED_INTERVAL_MINUTES = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_flagged_interval_minutes", "POLL_FLAGGED_INTERVAL_MINUTES") or 30)
+POLL_SALE_INTERVAL_MINUTES = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_sale_interval_minutes", "POLL_SALE_INTERVAL_MINUTES") or 30)
+# JSON list of [start, end] ISO datetimes, e.g. [["2026-06-01T00:00-04:00", "2026-06-04T00:00-04:00"]].
+POLL_SALE_WINDOWS = json.loads(get_secret_or_env(
+    f"{PROJECT_PREFIX}poll_sale_windows", "POLL_SALE_WINDOWS") or "[]")
+
+# Pages whose price fingerprint matches the last parse skip parse/compare/store,
+# but at most this many times in a row and for at most this many hours since
+# that parse; 0 skips disables change detection.
+CHANGE_DETECTION_MAX_SKIPS = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}change_detection_max_skips", "CHANGE_DETECTION_MAX_SKIPS") or 12)
+CHANGE_DETECTION_MAX_SKIP_HOURS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}change_detection_max_skip_hours", "CHANGE_DETECTION_MAX_SKIP_HOURS") or 24)
+
+# "single" scrapes every due URL in this process. "distributed" lets several
+# replicas lease batches of due URLs, with one elected leader sending notifications.
+WATCHER_MODE = get_secret_or_env(f"{PROJECT_PREFIX}watcher_mode", "WATCHER_MODE") or "single"
+if WATCHER_MODE not in ["single", "distributed"]:
+    raise ValueError("Invalid WATCHER_MODE environment variable or secret.")
+REPLICA_ID = get_secret_or_env(
+    f"{PROJECT_PREFIX}replica_id", "REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_TTL_SECONDS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}lease_ttl_seconds", "LEASE_TTL_SECONDS") or 300)
+LEASE_BATCH_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}lease_batch_size", "LEASE_BATCH_SIZE") or 50)
+
+# Outgoing Discord messages: queued notifications wait this many seconds so
+# repeated changes to a URL collapse into one and embeds share messages.
+NOTIFY_COALESCE_WINDOW = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}notify_coalesce_window", "NOTIFY_COALESCE_WINDOW") or 3)
+
+# URLs per page of /list and /delete; at most 25, the size of a Discord select menu.
+URL_PAGE_SIZE = min(25, int(get_secret_or_env(
+    f"{PROJECT_PREFIX}url_page_size", "URL_PAGE_SIZE") or 15))
+
+# Recent scrape results shared by the watcher and slash commands.
+SCRAPE_CACHE_TTL_SECONDS = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}scrape_cache_ttl_seconds", "SCRAPE_CACHE_TTL_SECONDS") or 600)
+
+# Latest price document per URL kept in memory; 0 keeps every tracked URL.
+LATEST_PRICE_CACHE_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}latest_price_cache_size", "LATEST_PRICE_CACHE_SIZE") or 0)
+
+# Price history inserts are buffered and written with insert_many.
+WRITE_BUFFER_SIZE = int(get_secret_or_env(
+    f"{PROJECT_PREFIX}write_buffer_size", "WRITE_BUFFER_SIZE") or 100)
+WRITE_BUFFER_MAX_DELAY = float(get_secret_or_env(
+    f"{PROJECT_PREFIX}write_buffer_max_delay", "WRITE_BUFFER_MAX_DELAY") or 5)
 
 PRICE_FIELDS = ["price1", "price2", "price3"]
-SOURCES = ["Paris", "Falabella", "Spdigital"]
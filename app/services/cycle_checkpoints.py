@@ -0,0 +1,136 @@
+import datetime
+from typing import Callable, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from app.config import CYCLE_HISTORY_DAYS, CYCLE_MAX_RESUMES
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+RUNNING = "running"
+FINISHED = "finished"
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class CycleCheckpoints:
+    """
+    Persists the progress of watcher cycles: one document per cycle with the
+    URLs still pending and a count of those completed. A cycle left running by
+    a crash or restart is resumed by the next tick. With several replicas each
+    cycle has an owner, and only its owner or, once the owner has stopped
+    checkpointing, any replica resumes it. A cycle already resumed
+    `max_resumes` times is abandoned instead, so one URL that keeps crashing
+    the process cannot stop every other URL from being polled. Finished and
+    abandoned cycles are kept for `history_days` so operators can see recent runs.
+    """
+
+    def __init__(self, get_collection: Callable, history_days: int = CYCLE_HISTORY_DAYS,
+                 max_resumes: int = CYCLE_MAX_RESUMES) -> None:
+        self.get_collection = get_collection
+        self.history_days = history_days
+        self.max_resumes = max_resumes
+
+    async def ensure_indexes(self) -> None:
+        collection = self.get_collection()
+        await collection.create_index([("status", ASCENDING), ("started_at", DESCENDING)])
+        await collection.create_index(
+            "finished_at", expireAfterSeconds=self.history_days * 86400,
+            partialFilterExpression={"status": FINISHED}, name="finished_cycle_ttl")
+
+    async def start(self, urls: List[str], started_at: Optional[datetime.datetime] = None,
+                    owner: Optional[str] = None) -> dict:
+        """Records a new running cycle over `urls`."""
+        now = started_at or _utcnow()
+        cycle = {
+            "_id": ObjectId(),
+            "owner": owner,
+            "status": RUNNING,
+            "started_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "total": len(urls),
+            "completed": 0,
+            "failed": 0,
+            "resumes": 0,
+            "pending": list(urls)
+        }
+        await self.get_collection().insert_one(cycle)
+        return cycle
+
+    async def resume(self, owner: Optional[str] = None,
+                     stale_after: Optional[float] = None) -> Optional[dict]:
+        """
+        Takes over the newest unfinished cycle, counting the resume, or returns
+        None. With `stale_after`, only cycles of `owner` or ones not
+        checkpointed for that many seconds are taken. Cycles out of resumes
+        are abandoned first.
+        """
+        collection = self.get_collection()
+        now = _utcnow()
+        query = {"status": RUNNING}
+        if stale_after is not None:
+            query["$or"] = [{"owner": owner},
+                            {"updated_at": {"$lt": now - datetime.timedelta(seconds=stale_after)}}]
+        while True:
+            # Marked finished (and flagged) so the history TTL cleans them up.
+            abandoned = await collection.find_one_and_update(
+                {**query, "resumes": {"$gte": self.max_resumes}},
+                {"$set": {"status": FINISHED, "abandoned": True, "finished_at": now, "updated_at": now}})
+            if abandoned is None:
+                break
+            logger.error("Abandoned watcher cycle %s after %d resumes with %d of %d URLs unfinished, "
+                         "starting with %s.", abandoned["_id"], abandoned["resumes"],
+                         len(abandoned["pending"]), abandoned["total"], abandoned["pending"][:3])
+        return await collection.find_one_and_update(
+            query,
+            {"$inc": {"resumes": 1}, "$set": {"owner": owner, "updated_at": now}},
+            sort=[("started_at", DESCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def add(self, cycle_id: ObjectId, urls: Iterable[str]) -> None:
+        """Adds URLs claimed after the cycle started to its pending list."""
+        urls = list(urls)
+        if not urls:
+            return
+        await self.get_collection().update_one(
+            {"_id": cycle_id},
+            {"$push": {"pending": {"$each": urls}}, "$inc": {"total": len(urls)},
+             "$set": {"updated_at": _utcnow()}})
+
+    async def heartbeat(self, cycle_id: ObjectId) -> None:
+        """Marks a cycle as alive between checkpoints."""
+        await self.get_collection().update_one({"_id": cycle_id}, {"$set": {"updated_at": _utcnow()}})
+
+    async def complete(self, cycle_id: ObjectId, urls: Iterable[str], failed: int = 0) -> None:
+        """Checkpoints URLs whose results are stored, removing them from pending."""
+        urls = list(urls)
+        if not urls:
+            return
+        await self.get_collection().update_one(
+            {"_id": cycle_id},
+            {"$pullAll": {"pending": urls},
+             "$inc": {"completed": len(urls), "failed": failed},
+             "$set": {"updated_at": _utcnow()}}
+        )
+
+    async def finish(self, cycle_id: ObjectId, stats: Optional[dict] = None) -> None:
+        now = _utcnow()
+        update = {"status": FINISHED, "finished_at": now, "updated_at": now, "pending": []}
+        if stats is not None:
+            update["stats"] = stats
+        await self.get_collection().update_one({"_id": cycle_id}, {"$set": update})
+
+    async def progress(self) -> Optional[dict]:
+        """The running cycle, or else the last finished one, without its pending list."""
+        collection = self.get_collection()
+        projection = {"pending": 0}
+        cycle = await collection.find_one(
+            {"status": RUNNING}, projection, sort=[("started_at", DESCENDING)])
+        if cycle is None:
+            cycle = await collection.find_one(
+                {"status": FINISHED}, projection, sort=[("finished_at", DESCENDING)])
+        return cycle
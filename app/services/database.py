@@ -1,19 +1,121 @@
 import datetime
-from pymongo import MongoClient, DESCENDING
-from app.config import MONGO_URI, MONGO_DB, MONGO_COLLECTION1, MONGO_COLLECTION2, service_name, PRICE_FIELDS
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from app.config import (
+    MONGO_URI, MONGO_DB, MONGO_COLLECTION1, MONGO_COLLECTION2, MONGO_TRACKING_COLLECTION,
+    MONGO_CYCLES_COLLECTION, MONGO_LEASES_COLLECTION, MONGO_NOTIFICATIONS_COLLECTION,
+    service_name, PRICE_FIELDS, URL_PAGE_SIZE,
+    LATEST_PRICE_CACHE_SIZE, WRITE_BUFFER_SIZE, WRITE_BUFFER_MAX_DELAY,
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS)
+from app.services.cycle_checkpoints import CycleCheckpoints
+from app.services.leases import LeaderLease, UrlLeases
 from app.services.logger import get_logger
+from app.services.notification_outbox import NotificationOutbox
+from app.services.price_cache import LatestPriceCache
+from app.services.price_history import PriceHistory
+from app.services.write_buffer import WriteBuffer
 from app.services.scrapers.base_scraper import ProductInfo
 from app.utils.price_parser import parse_price
+from app.utils.url_utils import normalize_url
 
 logger = get_logger(service_name)
 
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB]
 
-info_collection = db[MONGO_COLLECTION1]
-info_collection.create_index([("url", DESCENDING), ("timestamp", DESCENDING)])
-urls_collection = db[MONGO_COLLECTION2]
-urls_collection.create_index("source", unique=True)
+class Mongo:
+    """
+    Lazily created async MongoDB client. Nothing connects at import time; the
+    client and its pool are built on first use inside the running event loop.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[AsyncMongoClient] = None
+
+    @property
+    def client(self) -> AsyncMongoClient:
+        if self._client is None:
+            self._client = AsyncMongoClient(
+                MONGO_URI,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                retryReads=True,
+                retryWrites=True,
+                tz_aware=True
+            )
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[MONGO_DB]
+
+    @property
+    def info(self):
+        return self.db[MONGO_COLLECTION1]
+
+    @property
+    def urls(self):
+        return self.db[MONGO_TRACKING_COLLECTION]
+
+    @property
+    def legacy_urls(self):
+        return self.db[MONGO_COLLECTION2]
+
+    async def ensure_indexes(self) -> None:
+        await self.info.create_index([("url", DESCENDING), ("timestamp", DESCENDING)])
+        await self.urls.create_index("url_key", unique=True)
+        await self.urls.create_index([("priority", DESCENDING), ("next_due_at", ASCENDING)])
+        await self.urls.create_index([("source", ASCENDING), ("added_at", ASCENDING), ("_id", ASCENDING)])
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+mongo = Mongo()
+
+latest_prices = LatestPriceCache(lambda: mongo.info, LATEST_PRICE_CACHE_SIZE)
+# A failed insert must not stay cached as the latest price.
+price_writes = WriteBuffer(lambda: mongo.info, WRITE_BUFFER_SIZE, WRITE_BUFFER_MAX_DELAY,
+                           on_error=lambda document, _: latest_prices.invalidate(document["url"]))
+price_history = PriceHistory(lambda: mongo.db)
+cycle_checkpoints = CycleCheckpoints(lambda: mongo.db[MONGO_CYCLES_COLLECTION])
+# Distributed watcher mode: URL leases, the leader lease and the notification outbox.
+url_leases = UrlLeases(lambda: mongo.urls)
+leader_lease = LeaderLease(lambda: mongo.db[MONGO_LEASES_COLLECTION])
+notification_outbox = NotificationOutbox(lambda: mongo.db[MONGO_NOTIFICATIONS_COLLECTION])
+
+
+async def init_database() -> None:
+    "Creates the indexes, migrates legacy data and warms the latest-price cache."
+    await mongo.ensure_indexes()
+    await cycle_checkpoints.ensure_indexes()
+    await url_leases.ensure_indexes()
+    await notification_outbox.ensure_indexes()
+    await migrate_legacy_urls()
+    await price_history.ensure_collections()
+    await load_latest_prices()
+
+
+async def backfill_price_history() -> None:
+    "Replays pre-existing price records into the price history; run in the background after startup."
+    try:
+        await price_history.backfill(mongo.info)
+    except PyMongoError as e:
+        logger.error("Price history backfill stopped, it resumes on the next start: %s", e)
+
+
+async def close_database() -> None:
+    "Flushes buffered writes and closes the client."
+    try:
+        await flush_price_writes()
+    except PyMongoError as e:
+        logger.error("Failed to flush %d buffered price records on shutdown: %s", len(price_writes), e)
+    await mongo.close()
 
 
 def has_valid_price(new_info: ProductInfo) -> bool:
@@ -24,10 +126,9 @@ def has_valid_price(new_info: ProductInfo) -> bool:
     return False
 
 
-def should_store_product_info(url: str, new_info: ProductInfo, label_mapping: dict) -> bool:
+async def should_store_product_info(url: str, new_info: ProductInfo, label_mapping: dict) -> bool:
     """Determines if new product info should be stored based on price changes."""
-    latest_doc = info_collection.find_one(
-        {"url": url}, sort=[("timestamp", DESCENDING)])
+    latest_doc = await latest_prices.get(url)
     if not latest_doc:
         logger.debug(
             "No previous document found for URL: %s. Will store new info.", url)
@@ -52,15 +153,18 @@ def should_store_product_info(url: str, new_info: ProductInfo, label_mapping: di
     return False
 
 
-def store_product_info(prefix: str, url: str, info: ProductInfo, label_mapping: dict) -> None:
-    """Stores the product information as a new document whenever prices change, keeping historical records."""
+async def store_product_info(prefix: str, url: str, info: ProductInfo, label_mapping: dict) -> bool:
+    """
+    Buffers the product information as a new document whenever prices change,
+    keeping historical records. Returns True when a record was queued.
+    """
     if not has_valid_price(info):
         logger.warning("No valid prices for URL: %s. Skipping storage.", url)
-        return
+        return False
 
-    if not should_store_product_info(url, info, label_mapping):
+    if not await should_store_product_info(url, info, label_mapping):
         logger.debug("No price changes for URL: %s. Skipping storage.", url)
-        return
+        return False
 
     document = {
         "prefix": prefix,
@@ -84,48 +188,265 @@ def store_product_info(prefix: str, url: str, info: ProductInfo, label_mapping:
             )
             document[label] = None
 
-    try:
-        result = info_collection.insert_one(document)
-        logger.info("Inserted new price record with id: %s for URL: %s",
-                    result.inserted_id, url)
-    except Exception as e:
-        logger.error(
-            "Failed to insert document for URL: %s. Error: %s", url, e)
+    latest_prices.put(url, document)
+    price_history.add(document)
+    await price_writes.add(document)
+    if len(price_history) >= price_writes.max_docs:
+        await price_history.flush()
+    logger.debug("Queued new price record for URL: %s", url)
+    return True
+
 
+async def flush_price_writes() -> int:
+    "Writes every buffered price record, time-series point and rollup now."
+    written = await price_writes.flush()
+    await price_history.flush()
+    return written
 
-def add_url(source: str, url: str) -> None:
-    "Adds a URL to the list for the given source."
-    doc = urls_collection.find_one({"source": source})
-    if doc:
-        if url not in doc.get("urls", []):
-            urls_collection.update_one(
-                {"source": source}, {"$push": {"urls": url}})
-            return url
-    else:
-        urls_collection.insert_one({"source": source, "urls": [url]})
-        return url
-    return None
 
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
 
-def update_url(source: str, old_url: str, new_url: str) -> None:
-    "Updates an existing URL in the list for the given source."
-    urls_collection.update_one({"source": source, "urls": old_url}, {
-                               "$set": {"urls.$": new_url}})
 
+def tracking_document(source: str, url: str, added_at: Optional[datetime.datetime] = None,
+                      priority: int = 0) -> dict:
+    "Builds a new tracking document, due for scraping right away."
+    now = added_at or utcnow()
+    return {
+        "url_key": normalize_url(url),
+        "url": url,
+        "source": source,
+        "added_at": now,
+        "next_due_at": now,
+        "last_scraped_at": None,
+        "last_changed_at": None,
+        "failure_count": 0,
+        "priority": priority,
+        "poll_interval_s": None,
+        "change_rate": 0.0,
+        "content_hash": None,
+        "hash_skips": 0,
+        "hashed_at": None,
+        "lease_owner": None,
+        "lease_expires_at": None
+    }
 
-def delete_url(source: str, url: str) -> None:
-    "Deletes a URL from the list for the given source."
-    urls_collection.update_one({"source": source}, {"$pull": {"urls": url}})
+
+async def add_url(source: str, url: str, priority: int = 0) -> Optional[str]:
+    "Starts tracking a URL for the given source. Returns None when it is already tracked."
+    try:
+        await mongo.urls.insert_one(tracking_document(source, url, priority=priority))
+    except DuplicateKeyError:
+        return None
+    return url
+
+
+async def add_urls(entries: Iterable[Tuple[str, str]]) -> List[str]:
+    """
+    Starts tracking many (source, url) pairs in one unordered bulk write,
+    upserting on the normalized URL. Returns the URLs that were not tracked yet.
+    """
+    entries = list(entries)
+    now = utcnow()
+    operations = [
+        UpdateOne({"url_key": normalize_url(url)},
+                  {"$setOnInsert": tracking_document(source, url, now)}, upsert=True)
+        for source, url in entries
+    ]
+    if not operations:
+        return []
+    try:
+        result = await mongo.urls.bulk_write(operations, ordered=False)
+        upserted = list(result.upserted_ids)
+    except BulkWriteError as e:
+        # A concurrent insert of the same URL loses on the unique url_key; the rest still apply.
+        logger.error("Failed to add %d URLs: %s",
+                     len(e.details.get("writeErrors", [])), e.details.get("writeErrors"))
+        upserted = [row["index"] for row in e.details.get("upserted", [])]
+    return [entries[index][1] for index in sorted(upserted)]
 
 
-def get_urls_by_source(source: str) -> list:
+async def delete_url(source: str, url: str) -> None:
+    "Stops tracking a URL for the given source."
+    await mongo.urls.delete_one({"url_key": normalize_url(url), "source": source})
+    latest_prices.invalidate(url)
+
+
+async def get_urls_by_source(source: str) -> list:
     "Retrieves the list of URLs for the given source."
-    doc = urls_collection.find_one({"source": source})
-    if doc:
-        return doc.get("urls", [])
-    return []
+    cursor = mongo.urls.find({"source": source}, {"url": 1}).sort("added_at", ASCENDING)
+    return [doc["url"] async for doc in cursor]
+
+
+async def get_all_urls() -> list:
+    "Retrieves all URLs grouped by source, as {source, urls} documents."
+    cursor = await mongo.urls.aggregate([
+        {"$sort": {"source": 1, "added_at": 1}},
+        {"$group": {"_id": "$source", "urls": {"$push": "$url"}}},
+        {"$project": {"_id": 0, "source": "$_id", "urls": 1}}
+    ])
+    return await cursor.to_list()
+
+
+def page_key(doc: dict) -> tuple:
+    "The position of a tracking document in the /list order, used as a page cursor."
+    return doc["source"], doc["added_at"], doc["_id"]
+
+
+def _past(key: tuple, strict: str, op: str) -> dict:
+    "Keyset filter for documents past `key` in (source, added_at, _id) order; `op` compares the _id tie-break."
+    source, added_at, _id = key
+    return {"$or": [
+        {"source": {strict: source}},
+        {"source": source, "added_at": {strict: added_at}},
+        {"source": source, "added_at": added_at, "_id": {op: _id}}
+    ]}
+
+
+async def get_url_page(source: Optional[str] = None, cursor: Optional[tuple] = None, backward: bool = False,
+                       inclusive: bool = False, limit: int = URL_PAGE_SIZE) -> Tuple[list, bool]:
+    """
+    One page of tracking documents in (source, added_at, _id) order, read with
+    the index on those fields: the `limit` documents after `cursor` (a
+    page_key), or before it when `backward`. Returns the page and whether
+    more documents lie beyond it in that direction.
+    """
+    query = {} if source is None else {"source": source}
+    order = DESCENDING if backward else ASCENDING
+    if cursor is not None:
+        strict = "$lt" if backward else "$gt"
+        query = {"$and": [query, _past(cursor, strict, strict + "e" if inclusive else strict)]}
+    docs = await mongo.urls.find(query, {"source": 1, "url": 1, "added_at": 1}).sort(
+        [("source", order), ("added_at", order), ("_id", order)]).limit(limit + 1).to_list()
+    more = len(docs) > limit
+    docs = docs[:limit]
+    if backward:
+        docs.reverse()
+    return docs, more
+
+
+async def iter_tracked_urls(source: Optional[str] = None) -> AsyncIterator[dict]:
+    "Streams tracking documents, or those of one source, in /list order."
+    cursor = mongo.urls.find(
+        {} if source is None else {"source": source},
+        {"_id": 0, "source": 1, "url": 1, "added_at": 1, "last_scraped_at": 1, "last_changed_at": 1, "priority": 1}
+    ).sort([("source", ASCENDING), ("added_at", ASCENDING), ("_id", ASCENDING)])
+    async for doc in cursor:
+        yield doc
+
+
+async def count_urls(source: Optional[str] = None) -> int:
+    "Counts tracked URLs, or those of one source."
+    return await mongo.urls.count_documents({} if source is None else {"source": source})
+
+
+async def get_due_urls(now: Optional[datetime.datetime] = None, limit: int = 0) -> list:
+    "Returns tracking documents whose next_due_at has passed, highest priority first."
+    cursor = mongo.urls.find({"next_due_at": {"$lte": now or utcnow()}}).sort(
+        [("priority", DESCENDING), ("next_due_at", ASCENDING)])
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list()
+
+
+async def get_tracking_documents(urls: Iterable[str]) -> list:
+    "Returns the tracking documents of the given URLs; untracked URLs are left out."
+    keys = [normalize_url(url) for url in urls]
+    if not keys:
+        return []
+    return await mongo.urls.find({"url_key": {"$in": keys}}).to_list()
+
+
+async def set_url_priority(url: str, priority: int) -> bool:
+    """
+    Flags a URL (priority > 0) so it is scraped first and polled more often,
+    starting with the next tick. Returns False when the URL is not tracked.
+    """
+    update = {"$set": {"priority": priority}}
+    if priority > 0:
+        update["$min"] = {"next_due_at": utcnow()}
+    result = await mongo.urls.update_one({"url_key": normalize_url(url)}, update)
+    return result.matched_count > 0
+
+
+async def count_recent_changes(urls: Iterable[str], since: datetime.datetime) -> dict:
+    "Counts stored price changes per URL since `since`, in one aggregation."
+    urls = list(urls)
+    if not urls:
+        return {}
+    cursor = await mongo.info.aggregate([
+        {"$match": {"url": {"$in": urls}, "timestamp": {"$gte": since}}},
+        {"$group": {"_id": "$url", "changes": {"$sum": 1}}}
+    ])
+    return {row["_id"]: row["changes"] async for row in cursor}
+
+
+async def record_scrape_results(results: Iterable[dict]) -> int:
+    """
+    Writes the outcome of a watcher cycle in one bulk write. Each result has
+    url, succeeded, changed and next_due_at, plus the polling fields
+    poll_interval_s and change_rate and, when the page was fingerprinted,
+    content_hash and hash_skips (0 after a full parse, which also sets
+    hashed_at); failures bump failure_count.
+    """
+    now = utcnow()
+    operations = []
+    for result in results:
+        update = {"$set": {
+            "last_scraped_at": now,
+            "next_due_at": result["next_due_at"],
+            "poll_interval_s": result.get("poll_interval_s"),
+            "change_rate": result.get("change_rate", 0.0)
+        }}
+        if result["succeeded"]:
+            update["$set"]["failure_count"] = 0
+            if result.get("content_hash"):
+                update["$set"]["content_hash"] = result["content_hash"]
+                update["$set"]["hash_skips"] = result.get("hash_skips", 0)
+                if not result.get("hash_skips"):
+                    update["$set"]["hashed_at"] = now
+            if result["changed"]:
+                update["$set"]["last_changed_at"] = now
+        else:
+            update["$inc"] = {"failure_count": 1}
+        operations.append(UpdateOne({"url_key": normalize_url(result["url"])}, update))
+    if not operations:
+        return 0
+    try:
+        result = await mongo.urls.bulk_write(operations, ordered=False)
+        return result.modified_count
+    except BulkWriteError as e:
+        logger.error("Failed to record %d scrape results: %s",
+                     len(e.details.get("writeErrors", [])), e.details.get("writeErrors"))
+        return e.details.get("nModified", 0)
+
+
+async def migrate_legacy_urls() -> int:
+    """
+    Copies URLs from the legacy one-document-per-source arrays into the
+    tracking collection. Upserts are keyed on the normalized URL, so the
+    migration is idempotent; migrated source documents are flagged, not deleted.
+    """
+    migrated = 0
+    cursor = mongo.legacy_urls.find({"migrated_at": {"$exists": False}})
+    async for legacy in cursor:
+        source = legacy.get("source")
+        now = utcnow()
+        operations = [
+            UpdateOne({"url_key": normalize_url(url)},
+                      {"$setOnInsert": tracking_document(source, url, now)}, upsert=True)
+            for url in legacy.get("urls", [])
+        ]
+        if operations:
+            result = await mongo.urls.bulk_write(operations, ordered=False)
+            migrated += result.upserted_count
+        await mongo.legacy_urls.update_one({"_id": legacy["_id"]}, {"$set": {"migrated_at": now}})
+        logger.info("Migrated %d URLs for source %s to the tracking collection.",
+                    len(operations), source)
+    return migrated
 
 
-def get_all_urls() -> list:
-    "Retrieves all URL documents grouped by source."
-    return list(urls_collection.find({}))
+async def load_latest_prices() -> int:
+    "Warms the latest-price cache for every tracked URL with one aggregation."
+    docs = await get_all_urls()
+    return await latest_prices.load(url for doc in docs for url in doc.get("urls", []))
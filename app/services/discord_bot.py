@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands
 from app.config import DISCORD_BOT_TOKEN, GUILD_ID, service_name
@@ -6,8 +7,19 @@ from app.commands.add import add as add_command
 from app.commands.getlist import getlist as getlist_command
 from app.commands.compare import compare as compare_command
 from app.commands.delete import delete as delete_command
+from app.commands.status import status as status_command
+from app.commands.import_urls import import_urls as import_command
+from app.commands.export_urls import export_urls as export_command
+from app.commands.flag import flag as flag_command
 from app.services.openvpn import connect_vpn, ensure_vpn_connection
 from app.services.price_watcher import PriceWatcher
+from app.services.scrapers.admission import browser_admission
+from app.services.scrapers.browser_pool import browser_pool
+from app.services.scrapers.http_client import http_client
+from app.services.scrapers.parse_pool import parse_pool
+from app.services.loop_monitor import loop_monitor
+from app.services.database import init_database, close_database, backfill_price_history, leader_lease
+from app.services.notification_dispatcher import notification_dispatcher
 import threading
 import time
 
@@ -21,14 +33,27 @@ class DiscordBot(commands.AutoShardedBot):
         super().__init__(command_prefix=command_prefix, intents=intents)
         self.logger = get_logger(service_name)
         self.price_watcher = PriceWatcher(self)
+        self.backfill_task = None
 
     async def setup_hook(self):
         self.tree.add_command(add_command)
         self.tree.add_command(getlist_command)
         self.tree.add_command(compare_command)
         self.tree.add_command(delete_command)
+        self.tree.add_command(status_command)
+        self.tree.add_command(import_command)
+        self.tree.add_command(export_command)
+        self.tree.add_command(flag_command)
         await self.tree.sync(guild=discord.Object(id=GUILD_ID))
+        loop_monitor.start()
+        browser_admission.start()
+        parse_pool.start()
+        await init_database()
         self.price_watcher.watch_prices.start()
+        if self.price_watcher.distributed:
+            self.price_watcher.lead.start()
+        # Can take a while on a large history, so it does not hold up the watcher.
+        self.backfill_task = asyncio.create_task(backfill_price_history())
 
     async def on_ready(self):
         """Handles the event when the bot is ready."""
@@ -36,6 +61,23 @@ class DiscordBot(commands.AutoShardedBot):
                          self.user, self.shard_id, self.shard_count)
         await self.change_presence(activity=discord.Game("Watching prices"))
 
+    async def close(self):
+        """Stops the price watcher, flushes buffered writes and shuts down the shared clients."""
+        self.price_watcher.watch_prices.cancel()
+        if self.backfill_task is not None:
+            self.backfill_task.cancel()
+        if self.price_watcher.distributed:
+            self.price_watcher.lead.cancel()
+            await leader_lease.release()
+        await notification_dispatcher.close()
+        await browser_pool.close()
+        await http_client.close()
+        parse_pool.close()
+        await loop_monitor.stop()
+        await browser_admission.stop()
+        await close_database()
+        await super().close()
+
 
 def wait_for_vpn_connection():
     """
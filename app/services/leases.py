@@ -0,0 +1,141 @@
+import datetime
+from typing import Callable, Iterable, List, Optional
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config import LEASE_TTL_SECONDS, REPLICA_ID
+from app.services.logger import get_logger
+from app.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _free(now: datetime.datetime) -> dict:
+    """Matches documents with no lease or an expired one."""
+    return {"$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]}
+
+
+class UrlLeases:
+    """
+    Leases on tracking documents (lease_owner, lease_expires_at), so several
+    replicas can scrape disjoint batches of due URLs. Each URL is claimed with
+    an atomic find_one_and_update; leases are renewed while the batch is being
+    worked on and released once its results are recorded. A lease held by a
+    replica that died expires after `ttl` seconds and the URL is claimed again.
+    """
+
+    def __init__(self, get_collection: Callable, owner: str = REPLICA_ID,
+                 ttl: float = LEASE_TTL_SECONDS) -> None:
+        self.get_collection = get_collection
+        self.owner = owner
+        self.ttl = ttl
+
+    def _expiry(self, now: datetime.datetime) -> datetime.datetime:
+        return now + datetime.timedelta(seconds=self.ttl)
+
+    async def ensure_indexes(self) -> None:
+        await self.get_collection().create_index([("lease_owner", ASCENDING), ("url_key", ASCENDING)])
+
+    async def claim_due(self, due_before: datetime.datetime, limit: int) -> List[dict]:
+        """Leases up to `limit` due, unleased URLs, highest priority first."""
+        collection = self.get_collection()
+        claimed = []
+        while len(claimed) < limit:
+            now = _utcnow()
+            doc = await collection.find_one_and_update(
+                {"next_due_at": {"$lte": due_before}, **_free(now)},
+                {"$set": {"lease_owner": self.owner, "lease_expires_at": self._expiry(now)}},
+                sort=[("priority", DESCENDING), ("next_due_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                break
+            claimed.append(doc)
+        return claimed
+
+    async def claim_urls(self, urls: Iterable[str]) -> List[dict]:
+        """Leases the given URLs where no other replica holds them, e.g. to resume a cycle."""
+        keys = [normalize_url(url) for url in urls]
+        if not keys:
+            return []
+        now = _utcnow()
+        collection = self.get_collection()
+        await collection.update_many(
+            {"url_key": {"$in": keys}, "$or": [{"lease_owner": self.owner}, *_free(now)["$or"]]},
+            {"$set": {"lease_owner": self.owner, "lease_expires_at": self._expiry(now)}})
+        return await collection.find({"url_key": {"$in": keys}, "lease_owner": self.owner}).to_list()
+
+    async def renew(self, urls: Iterable[str]) -> int:
+        """Extends this replica's leases on `urls`. Returns how many are still held."""
+        keys = [normalize_url(url) for url in urls]
+        if not keys:
+            return 0
+        result = await self.get_collection().update_many(
+            {"url_key": {"$in": keys}, "lease_owner": self.owner},
+            {"$set": {"lease_expires_at": self._expiry(_utcnow())}})
+        if result.matched_count < len(keys):
+            logger.warning("Lost the lease on %d of %d URLs.", len(keys) - result.matched_count, len(keys))
+        return result.matched_count
+
+    async def release(self, urls: Iterable[str]) -> None:
+        keys = [normalize_url(url) for url in urls]
+        if not keys:
+            return
+        await self.get_collection().update_many(
+            {"url_key": {"$in": keys}, "lease_owner": self.owner},
+            {"$set": {"lease_owner": None, "lease_expires_at": None}})
+
+
+class LeaderLease:
+    """
+    Leader election over one lease document: a replica becomes leader by
+    taking the document when it is free or expired, and stays leader by
+    renewing it before `ttl` runs out. Renewal and takeover are a single
+    find_one_and_update, so at most one replica holds a live lease.
+    """
+
+    def __init__(self, get_collection: Callable, name: str = "leader", owner: str = REPLICA_ID,
+                 ttl: float = LEASE_TTL_SECONDS) -> None:
+        self.get_collection = get_collection
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+        self.expires_at: Optional[datetime.datetime] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """True until the lease this replica last renewed runs out."""
+        return self.expires_at is not None and self.expires_at > _utcnow()
+
+    async def acquire(self) -> bool:
+        """Takes or renews the lease. Returns True while this replica is leader."""
+        now = _utcnow()
+        expires_at = now + datetime.timedelta(seconds=self.ttl)
+        try:
+            doc = await self.get_collection().find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": expires_at, "renewed_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The upsert lost against a live lease held by another replica.
+            doc = None
+
+        was_leader = self.is_leader
+        self.expires_at = expires_at if doc is not None and doc["owner"] == self.owner else None
+        if self.is_leader != was_leader:
+            logger.info("Replica %s %s the %s lease.", self.owner,
+                        "acquired" if self.is_leader else "lost", self.name)
+        return self.is_leader
+
+    async def release(self) -> None:
+        if self.is_leader:
+            await self.get_collection().delete_one({"_id": self.name, "owner": self.owner})
+            self.expires_at = None
+
+    async def holder(self) -> Optional[dict]:
+        return await self.get_collection().find_one({"_id": self.name})
@@ -0,0 +1,221 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import List, Optional, Union
+import discord
+from app.config import NOTIFY_COALESCE_WINDOW
+from app.services.logger import get_logger
+from app.services.price_change import PriceChange
+
+logger = get_logger(__name__)
+
+# Discord allows 10 embeds and 6000 embed characters per message.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Used when a 429 carries no reset header.
+DEFAULT_RETRY_AFTER = 1.0
+MAX_ATTEMPTS = 5
+
+
+def _consume(future: asyncio.Future) -> None:
+    # Callers that do not await the result should not trigger "exception never retrieved".
+    if not future.cancelled():
+        future.exception()
+
+
+class Notification:
+    def __init__(self, channel, payload: Union[discord.Embed, PriceChange], key,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        self.channel = channel
+        self.payload = payload
+        self.key = key
+        self.queued_at = time.monotonic()
+        self.future: asyncio.Future = loop.create_future()
+
+    @property
+    def embed(self) -> discord.Embed:
+        """The embed to send; a PriceChange is only rendered here, at send time."""
+        return self.payload.embed() if isinstance(self.payload, PriceChange) else self.payload
+
+
+def take_batch(items: list) -> list:
+    """Removes and returns the leading notifications whose embeds fit in one message."""
+    batch, chars = [], 0
+    while items and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+        size = len(items[0].embed)
+        if batch and chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+            break
+        batch.append(items.pop(0))
+        chars += size
+    return batch
+
+
+def retry_after(error: discord.HTTPException) -> float:
+    """Seconds to wait from the rate-limit headers of a 429 response."""
+    headers = getattr(error.response, "headers", None) or {}
+    for header in ("X-RateLimit-Reset-After", "Retry-After"):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return DEFAULT_RETRY_AFTER
+
+
+class NotificationDispatcher:
+    """
+    Queue of outgoing embeds drained by one background task, so scraping
+    never waits on Discord. A notification is held for `window` seconds after
+    it is queued: a newer one for the same (channel, key) replaces it, or is
+    merged into it when both are price changes, and everything due for a
+    channel goes out together in messages of up to 10 embeds. Waits follow
+    Discord's rate-limit headers (discord.py honours the bucket headers on
+    every request; 429s that reach us are retried after
+    X-RateLimit-Reset-After) instead of fixed sleeps. flush() sends
+    everything immediately, e.g. on shutdown.
+    """
+
+    def __init__(self, window: float = NOTIFY_COALESCE_WINDOW) -> None:
+        self.window = window
+        self._pending: "OrderedDict[tuple, Notification]" = OrderedDict()
+        self._ids = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.coalesced = 0
+        self.messages = 0
+        self.embeds = 0
+        self.rate_limited = 0
+        self.rate_limited_seconds = 0.0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._send_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, channel, payload: Union[discord.Embed, PriceChange], key: Optional[str] = None) -> asyncio.Future:
+        """
+        Queues an embed, or a PriceChange rendered when sent, without waiting.
+        A pending notification with the same key for the same channel keeps
+        its place in the queue and is replaced, or merged with the new one
+        when both are price changes; a merge that leaves no change drops it.
+        The returned future resolves once the message is sent.
+        """
+        self.start()
+        self.queued += 1
+        slot = (channel.id, key if key is not None else next(self._ids))
+        existing = self._pending.get(slot)
+        if existing is not None:
+            self.coalesced += 1
+            if isinstance(existing.payload, PriceChange) and isinstance(payload, PriceChange):
+                payload = existing.payload.merge(payload)
+            if payload is None:
+                del self._pending[slot]
+                existing.future.set_result(None)
+            else:
+                existing.payload = payload
+            return existing.future
+        notification = Notification(channel, payload, key, asyncio.get_running_loop())
+        notification.future.add_done_callback(_consume)
+        self._pending[slot] = notification
+        self._wakeup.set()
+        return notification.future
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                oldest = next(iter(self._pending.values()))
+                delay = oldest.queued_at + self.window - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    await self._send_due(time.monotonic() - self.window)
+                except Exception as e:
+                    logger.error("Error dispatching notifications: %s", e)
+
+    async def _send_due(self, queued_before: Optional[float] = None) -> None:
+        async with self._send_lock:
+            due = [slot for slot, n in self._pending.items()
+                   if queued_before is None or n.queued_at <= queued_before]
+            by_channel = OrderedDict()
+            for slot in due:
+                notification = self._pending.pop(slot)
+                by_channel.setdefault(notification.channel.id, []).append(notification)
+            for items in by_channel.values():
+                while items:
+                    await self._send(take_batch(items))
+
+    async def _send(self, batch: List[Notification]) -> None:
+        channel = batch[0].channel
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await channel.send(embeds=[n.embed for n in batch])
+            except discord.RateLimited as e:
+                wait = e.retry_after
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == MAX_ATTEMPTS:
+                    self._fail(batch, e)
+                    return
+                wait = retry_after(e)
+            except Exception as e:
+                self._fail(batch, e)
+                return
+            else:
+                self.messages += 1
+                self.embeds += len(batch)
+                for n in batch:
+                    if not n.future.done():
+                        n.future.set_result(None)
+                return
+            self.rate_limited += 1
+            self.rate_limited_seconds += wait
+            logger.warning("Rate limited sending to channel %s, retrying in %.2fs.", channel.id, wait)
+            await asyncio.sleep(wait)
+        self._fail(batch, RuntimeError("Still rate limited after retries"))
+
+    def _fail(self, batch: List[Notification], error: Exception) -> None:
+        logger.error("Failed to send %d notifications: %s", len(batch), error)
+        self.failed += len(batch)
+        for n in batch:
+            if not n.future.done():
+                n.future.set_exception(error)
+
+    async def flush(self) -> None:
+        """Sends every queued notification now, ignoring the coalescing window."""
+        if self._task is not None and self._pending:
+            await self._send_due()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "messages": self.messages,
+            "embeds": self.embeds,
+            "rate_limited": self.rate_limited,
+            "rate_limited_s": round(self.rate_limited_seconds, 1),
+            "failed": self.failed
+        }
+
+
+notification_dispatcher = NotificationDispatcher()
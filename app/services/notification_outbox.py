@@ -0,0 +1,93 @@
+import asyncio
+import datetime
+from typing import Awaitable, Callable
+from pymongo import ASCENDING, ReturnDocument
+from app.config import LEASE_TTL_SECONDS, REPLICA_ID
+from app.services.logger import get_logger
+from app.services.price_change import PriceChange
+
+logger = get_logger(__name__)
+
+# Sent notifications are kept this long for auditing.
+SENT_RETENTION_DAYS = 7
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class NotificationOutbox:
+    """
+    Price changes queued in Mongo by every replica and sent by the
+    leader only, so each change is announced once however many replicas
+    scrape. A notification is claimed before it is sent and marked sent
+    after; a claim whose sender died is retried once `claim_ttl` has passed.
+    """
+
+    def __init__(self, get_collection: Callable, owner: str = REPLICA_ID,
+                 claim_ttl: float = LEASE_TTL_SECONDS) -> None:
+        self.get_collection = get_collection
+        self.owner = owner
+        self.claim_ttl = claim_ttl
+        self.sent = 0
+        self.failed = 0
+
+    async def ensure_indexes(self) -> None:
+        collection = self.get_collection()
+        await collection.create_index([("sent_at", ASCENDING), ("created_at", ASCENDING)])
+        await collection.create_index(
+            "sent_at", expireAfterSeconds=SENT_RETENTION_DAYS * 86400,
+            partialFilterExpression={"sent_at": {"$type": "date"}}, name="sent_notification_ttl")
+
+    async def add(self, change: PriceChange) -> None:
+        await self.get_collection().insert_one({
+            "url": change.url,
+            "change": change.to_dict(),
+            "created_at": _utcnow(),
+            "claimed_by": None,
+            "claimed_at": None,
+            "sent_at": None
+        })
+
+    async def drain(self, send: Callable[[PriceChange], Awaitable], limit: int = 100) -> int:
+        """
+        Claims up to `limit` pending notifications, oldest first, and sends
+        them concurrently with `send(change)`, so a dispatcher can batch
+        them. Returns how many were sent; failed ones are released for retry.
+        """
+        collection = self.get_collection()
+        claimed = []
+        while len(claimed) < limit:
+            now = _utcnow()
+            stale = now - datetime.timedelta(seconds=self.claim_ttl)
+            doc = await collection.find_one_and_update(
+                {"sent_at": None, "$or": [{"claimed_at": None}, {"claimed_at": {"$lt": stale}}]},
+                {"$set": {"claimed_by": self.owner, "claimed_at": now}},
+                sort=[("created_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                break
+            claimed.append(doc)
+        if not claimed:
+            return 0
+
+        results = await asyncio.gather(
+            *(send(PriceChange.from_dict(doc["change"])) for doc in claimed),
+            return_exceptions=True)
+        sent_ids = [doc["_id"] for doc, result in zip(claimed, results) if not isinstance(result, Exception)]
+        failed_ids = [doc["_id"] for doc, result in zip(claimed, results) if isinstance(result, Exception)]
+        if sent_ids:
+            await collection.update_many({"_id": {"$in": sent_ids}}, {"$set": {"sent_at": _utcnow()}})
+        if failed_ids:
+            logger.error("Failed to send %d notifications; they will be retried.", len(failed_ids))
+            await collection.update_many({"_id": {"$in": failed_ids}}, {"$set": {"claimed_at": None}})
+        self.sent += len(sent_ids)
+        self.failed += len(failed_ids)
+        return len(sent_ids)
+
+    async def pending(self) -> int:
+        return await self.get_collection().count_documents({"sent_at": None})
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "failed": self.failed}
@@ -0,0 +1,108 @@
+import datetime
+from typing import Iterable, List, Optional, Tuple
+from app.config import (
+    POLL_MIN_INTERVAL_MINUTES, POLL_MAX_INTERVAL_HOURS, POLL_DEFAULT_INTERVAL_HOURS, POLL_BACKOFF,
+    POLL_LOOKBACK_DAYS, POLL_FLAGGED_INTERVAL_MINUTES, POLL_SALE_INTERVAL_MINUTES, POLL_SALE_WINDOWS)
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _parse_window(window) -> Tuple[datetime.datetime, datetime.datetime]:
+    start, end = (datetime.datetime.fromisoformat(value) for value in window)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=datetime.timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=datetime.timezone.utc)
+    return start, end
+
+
+class PollingPolicy:
+    """
+    Picks each URL's next polling interval from its observed change rate.
+    A URL is polled about twice per expected change, within
+    [min_interval, max_interval]. The interval drops to the minimum right
+    after a change, is capped during sale windows and for flagged
+    (priority > 0) URLs, and grows by at most `backoff` per unchanged scrape.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = POLL_MIN_INTERVAL_MINUTES * 60,
+        max_interval: float = POLL_MAX_INTERVAL_HOURS * 3600,
+        default_interval: float = POLL_DEFAULT_INTERVAL_HOURS * 3600,
+        backoff: float = POLL_BACKOFF,
+        lookback_days: int = POLL_LOOKBACK_DAYS,
+        flagged_interval: float = POLL_FLAGGED_INTERVAL_MINUTES * 60,
+        sale_interval: float = POLL_SALE_INTERVAL_MINUTES * 60,
+        sale_windows: Iterable = POLL_SALE_WINDOWS
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.default_interval = min(max(default_interval, self.min_interval), self.max_interval)
+        self.backoff = max(1.0, backoff)
+        self.lookback = datetime.timedelta(days=lookback_days)
+        self.flagged_interval = flagged_interval
+        self.sale_interval = sale_interval
+        self.sale_windows: List[Tuple[datetime.datetime, datetime.datetime]] = [
+            _parse_window(w) for w in sale_windows]
+
+    def in_sale_window(self, now: datetime.datetime) -> bool:
+        return any(start <= now < end for start, end in self.sale_windows)
+
+    def change_rate(self, changes: int, tracking: dict, now: datetime.datetime) -> float:
+        """Observed changes per hour over the lookback window (or since the URL was added)."""
+        observed = self.lookback
+        added_at = tracking.get("added_at")
+        if added_at is not None:
+            if added_at.tzinfo is None:
+                added_at = added_at.replace(tzinfo=datetime.timezone.utc)
+            observed = min(observed, now - added_at)
+        hours = max(observed.total_seconds() / 3600, 1.0)
+        return changes / hours
+
+    def interval(self, tracking: dict, changed: bool, change_rate: float, now: datetime.datetime) -> float:
+        if changed:
+            interval = self.min_interval
+        else:
+            target = 1 / (2 * change_rate) * 3600 if change_rate > 0 else self.max_interval
+            previous = tracking.get("poll_interval_s") or self.default_interval
+            interval = min(target, previous * self.backoff)
+
+        if tracking.get("priority", 0) > 0:
+            interval = min(interval, self.flagged_interval)
+        if self.in_sale_window(now):
+            interval = min(interval, self.sale_interval)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def schedule(
+        self,
+        tracking: Optional[dict],
+        url: str,
+        succeeded: bool,
+        changed: bool,
+        changes: int,
+        started: datetime.datetime
+    ) -> dict:
+        """
+        Scrape result for record_scrape_results(). Failed scrapes keep the
+        previous interval, so a flaky page is neither hammered nor dropped.
+        """
+        tracking = tracking or {}
+        if succeeded:
+            rate = self.change_rate(changes, tracking, started)
+            interval = self.interval(tracking, changed, rate, started)
+        else:
+            rate = tracking.get("change_rate", 0.0)
+            interval = tracking.get("poll_interval_s") or self.default_interval
+        return {
+            "url": url,
+            "succeeded": succeeded,
+            "changed": changed,
+            "change_rate": rate,
+            "poll_interval_s": interval,
+            "next_due_at": started + datetime.timedelta(seconds=interval)
+        }
+
+
+polling_policy = PollingPolicy()
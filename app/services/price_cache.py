@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from pymongo import DESCENDING
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Cached marker for URLs known to have no price history yet.
+_NO_HISTORY = object()
+
+
+class LatestPriceCache:
+    """
+    Latest price document per URL. Loaded with one aggregation for every
+    tracked URL, then kept current write-through by store_product_info, so a
+    steady-state lookup never reads from Mongo. With `max_entries` set it
+    behaves as an LRU and a miss falls back to a single find_one.
+    `get_collection` returns the async collection, which is created lazily.
+    """
+
+    def __init__(self, get_collection: Callable, max_entries: int = 0) -> None:
+        self.get_collection = get_collection
+        self.max_entries = max(0, max_entries)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, url: str, value) -> None:
+        self._entries[url] = value
+        self._entries.move_to_end(url)
+        if self.max_entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def load(self, urls: Iterable[str]) -> int:
+        """Fetches the newest document of each URL in a single aggregation."""
+        urls = list(dict.fromkeys(urls))
+        if self.max_entries:
+            urls = urls[:self.max_entries]
+        if not urls:
+            return 0
+
+        pipeline = [
+            {"$match": {"url": {"$in": urls}}},
+            {"$sort": {"url": 1, "timestamp": -1}},
+            {"$group": {"_id": "$url", "doc": {"$first": "$$ROOT"}}}
+        ]
+        cursor = await self.get_collection().aggregate(pipeline)
+        found = {row["_id"]: row["doc"] async for row in cursor}
+        for url in urls:
+            self._remember(url, found.get(url, _NO_HISTORY))
+        logger.info("Loaded latest prices for %d URLs (%d with history).", len(urls), len(found))
+        return len(found)
+
+    async def get(self, url: str) -> Optional[dict]:
+        value = self._entries.get(url)
+        if value is not None:
+            self.hits += 1
+            self._entries.move_to_end(url)
+            return None if value is _NO_HISTORY else value
+
+        self.misses += 1
+        doc = await self.get_collection().find_one({"url": url}, sort=[("timestamp", DESCENDING)])
+        # A write-through put() during the read is newer than what was read.
+        if url in self._entries:
+            return await self.get(url)
+        self._remember(url, doc if doc is not None else _NO_HISTORY)
+        return doc
+
+    def put(self, url: str, document: dict) -> None:
+        """Write-through hook: records a freshly inserted document as the latest."""
+        self._remember(url, document)
+
+    def invalidate(self, url: str) -> None:
+        """Drops a URL, e.g. when it is deleted or renamed."""
+        self._entries.pop(url, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,77 @@
+from typing import Dict, Optional, Tuple
+import discord
+from dateutil import parser
+from app.config import PRICE_FIELDS
+from app.services.scrapers.base_scraper import ProductInfo
+from app.utils.price_parser import parse_price, format_price
+
+
+class PriceChange:
+    """
+    Price changes of one URL as {label: (old, new)}. Notifications carry
+    this rather than an embed, so changes queued for the same URL can be
+    merged; the embed is only built when the notification is sent.
+    """
+
+    def __init__(self, source: str, url: str, name: str, timestamp: str,
+                 changes: Dict[str, Tuple[int, int]]) -> None:
+        self.source = source
+        self.url = url
+        self.name = name
+        self.timestamp = timestamp
+        self.changes = changes
+
+    @classmethod
+    def detect(cls, source: str, url: str, new_info: ProductInfo, last_info: dict,
+               labels: dict) -> Optional["PriceChange"]:
+        """The changes between the stored prices and a new scrape, or None when nothing changed."""
+        changes = {}
+        for field in PRICE_FIELDS:
+            label = labels.get(field, field)
+            new_price = parse_price(getattr(new_info, field))
+            old_price = last_info.get(label)
+            if new_price != old_price and new_price is not None and old_price is not None:
+                changes[label] = (old_price, new_price)
+        if not changes:
+            return None
+        return cls(source, url, new_info.name, new_info.timestamp, changes)
+
+    def merge(self, newer: "PriceChange") -> Optional["PriceChange"]:
+        """
+        Folds a later change of the same URL into this one: every price keeps
+        its old value from before the first change and takes the newest value,
+        so A→B then B→C reads "from A to C". Prices back at their old value
+        are left out, and None means nothing changed overall.
+        """
+        changes = dict(self.changes)
+        for label, (old, new) in newer.changes.items():
+            changes[label] = (changes[label][0] if label in changes else old, new)
+        changes = {label: (old, new) for label, (old, new) in changes.items() if old != new}
+        if not changes:
+            return None
+        return PriceChange(newer.source, newer.url, newer.name, newer.timestamp, changes)
+
+    def embed(self) -> discord.Embed:
+        description = ""
+        for label, (old, new) in self.changes.items():
+            arrow = "🔻 Decreased" if new < old else "🔺 Increased"
+            description += f"{arrow} **{label}** from {format_price(old)} to {format_price(new)}\n"
+
+        embed = discord.Embed(
+            title=f"{self.source.capitalize()} - {self.name}",
+            description=description,
+            url=self.url,
+            color=0x3498db
+        )
+        embed.set_footer(text=f"Updated at {parser.parse(self.timestamp).strftime('%d/%m/%Y %H:%M:%S')}")
+        return embed
+
+    def to_dict(self) -> dict:
+        # Changes are a list, as labels are not safe as MongoDB field names.
+        return {"source": self.source, "url": self.url, "name": self.name, "timestamp": self.timestamp,
+                "changes": [[label, old, new] for label, (old, new) in self.changes.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PriceChange":
+        return cls(data["source"], data["url"], data["name"], data["timestamp"],
+                   {label: (old, new) for label, old, new in data["changes"]})
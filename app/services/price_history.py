@@ -0,0 +1,378 @@
+import datetime
+from typing import Callable, Dict, List, Optional
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import (
+    BulkWriteError, CollectionInvalid, ExecutionTimeout, OperationFailure, PyMongoError)
+from app.config import (
+    MONGO_PRICE_POINTS_COLLECTION, MONGO_PRICE_ROLLUPS_COLLECTION, PRICE_POINTS_RETENTION_DAYS,
+    PRICE_HOURLY_RETENTION_DAYS, PRICE_QUERY_MAX_TIME_MS, REPLICA_ID, LEASE_TTL_SECONDS)
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+RAW = "raw"
+HOUR = "hour"
+DAY = "day"
+RESOLUTIONS = (RAW, HOUR, DAY)
+
+# Widest range each resolution serves, so a query touches a bounded number of documents.
+MAX_RANGE = {
+    RAW: datetime.timedelta(days=2),
+    HOUR: datetime.timedelta(days=62)
+}
+
+# Fields of a price history document that are not prices.
+META_KEYS = frozenset(("_id", "prefix", "url", "timestamp", "product_name"))
+
+# Time-series collections need MongoDB 5.0.
+MIN_SERVER_VERSION = (5, 0)
+# Progress of the backfill from the info collection, kept in the rollups collection.
+BACKFILL_ID = "backfill"
+# Server error code for creating a collection that already exists.
+NAMESPACE_EXISTS = 48
+
+
+def bucket_start(ts: datetime.datetime, period: str) -> datetime.datetime:
+    ts = ts.astimezone(datetime.timezone.utc) if ts.tzinfo else ts.replace(tzinfo=datetime.timezone.utc)
+    if period == HOUR:
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def resolution_for(start: datetime.datetime, end: datetime.datetime) -> str:
+    """Finest resolution whose MAX_RANGE covers [start, end)."""
+    span = end - start
+    for resolution in (RAW, HOUR):
+        if span <= MAX_RANGE[resolution]:
+            return resolution
+    return DAY
+
+
+class PriceHistory:
+    """
+    Price history in a time-series collection (metaField {url, source}) with
+    hourly and daily min/max/last rollups kept up to date incrementally.
+    Raw points and hourly rollups expire after their retention period; daily
+    rollups are kept, so long-range queries stay cheap with years of data.
+    Points and rollup deltas are buffered and written by flush().
+
+    Requires MongoDB 5.0 or newer; on older servers price history is disabled
+    with an error logged, and the per-change documents are still stored.
+
+    The one-off backfill is claimed by a single replica (`owner`) through its
+    marker document; a claim not renewed for `claim_ttl` seconds is taken over.
+    """
+
+    def __init__(
+        self,
+        get_db: Callable,
+        points_retention_days: int = PRICE_POINTS_RETENTION_DAYS,
+        hourly_retention_days: int = PRICE_HOURLY_RETENTION_DAYS,
+        max_time_ms: int = PRICE_QUERY_MAX_TIME_MS,
+        owner: str = REPLICA_ID,
+        claim_ttl: float = LEASE_TTL_SECONDS
+    ) -> None:
+        self.get_db = get_db
+        self.owner = owner
+        self.claim_ttl = claim_ttl
+        self.points_retention_days = points_retention_days
+        self.hourly_retention_days = hourly_retention_days
+        self.max_time_ms = max_time_ms
+        self._points: List[dict] = []
+        self._rollups: Dict[tuple, dict] = {}
+        self.enabled = True
+
+    @property
+    def points(self):
+        return self.get_db()[MONGO_PRICE_POINTS_COLLECTION]
+
+    @property
+    def rollups(self):
+        return self.get_db()[MONGO_PRICE_ROLLUPS_COLLECTION]
+
+    async def ensure_collections(self) -> bool:
+        """
+        Creates the time-series and rollup collections. Returns True if the
+        series is new, in which case a backfill is recorded as pending.
+        Disables price history when the server is older than MongoDB 5.0.
+        """
+        db = self.get_db()
+        version = tuple((await db.command("buildInfo")).get("versionArray", [0, 0])[:2])
+        if version < MIN_SERVER_VERSION:
+            self.enabled = False
+            logger.error("Price history needs MongoDB %d.%d or newer for time-series collections, "
+                         "but the server is %s. Price history is disabled.",
+                         *MIN_SERVER_VERSION, ".".join(map(str, version)))
+            return False
+
+        created = False
+        if MONGO_PRICE_POINTS_COLLECTION not in await db.list_collection_names(
+                filter={"name": MONGO_PRICE_POINTS_COLLECTION}):
+            try:
+                await db.create_collection(
+                    MONGO_PRICE_POINTS_COLLECTION,
+                    timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "hours"},
+                    expireAfterSeconds=self.points_retention_days * 86400
+                )
+                created = True
+            except CollectionInvalid:
+                # Another replica created it since the listing.
+                pass
+            except OperationFailure as e:
+                if e.code != NAMESPACE_EXISTS:
+                    raise
+        await self.points.create_index([("meta.url", ASCENDING), ("timestamp", ASCENDING)])
+        await self.rollups.create_index(
+            [("url", ASCENDING), ("period", ASCENDING), ("start", ASCENDING)], unique=True)
+        await self.rollups.create_index(
+            "start", expireAfterSeconds=self.hourly_retention_days * 86400,
+            partialFilterExpression={"period": HOUR}, name="hourly_rollup_ttl")
+        if created:
+            # Documents from now on reach the series through add(), so the backfill stops here.
+            await self.rollups.replace_one(
+                {"_id": BACKFILL_ID},
+                {"done": False, "until": datetime.datetime.now(datetime.timezone.utc)}, upsert=True)
+        else:
+            # A series created before backfills were tracked was backfilled at creation.
+            await self.rollups.update_one(
+                {"_id": BACKFILL_ID}, {"$setOnInsert": {"done": True}}, upsert=True)
+        return created
+
+    def add(self, document: dict) -> None:
+        """Queues one price history document (as stored in the info collection)."""
+        if not self.enabled:
+            return
+        prices = {k: v for k, v in document.items() if k not in META_KEYS and v is not None}
+        if not prices:
+            return
+        ts = document["timestamp"]
+        url = document["url"]
+        source = document.get("prefix")
+        self._points.append({"timestamp": ts, "meta": {"url": url, "source": source}, "prices": prices})
+
+        for period in (HOUR, DAY):
+            key = (url, period, bucket_start(ts, period))
+            self._merge_rollup(key, {"source": source, "min": prices, "max": prices, "last": prices, "last_at": ts})
+
+    def _merge_rollup(self, key: tuple, other: dict) -> None:
+        """Folds a rollup delta into the queued one for the same bucket."""
+        delta = self._rollups.get(key)
+        if delta is None:
+            self._rollups[key] = {"source": other["source"], "min": dict(other["min"]),
+                                  "max": dict(other["max"]), "last": dict(other["last"]),
+                                  "last_at": other["last_at"]}
+            return
+        for label, value in other["min"].items():
+            delta["min"][label] = min(value, delta["min"].get(label, value))
+        for label, value in other["max"].items():
+            delta["max"][label] = max(value, delta["max"].get(label, value))
+        if other["last_at"] >= delta["last_at"]:
+            delta["last"].update(other["last"])
+            delta["last_at"] = other["last_at"]
+        else:
+            delta["last"] = {**other["last"], **delta["last"]}
+
+    def _requeue(self, points: List[dict], rollups: Dict[tuple, dict]) -> None:
+        # Points and deltas queued while the write was in flight stay behind the failed ones.
+        self._points[:0] = points
+        for key, delta in rollups.items():
+            self._merge_rollup(key, delta)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    async def flush(self, strict: bool = False) -> int:
+        """
+        Writes queued points and merges the rollup deltas. Returns points
+        written. When a write fails as a whole, the points or deltas it held
+        are queued again for the next flush; with `strict` the error is then
+        raised, otherwise logged. Per-document errors are only logged.
+        """
+        points, self._points = self._points, []
+        rollups, self._rollups = self._rollups, {}
+        if not points and not rollups:
+            return 0
+
+        written = 0
+        try:
+            if points:
+                result = await self.points.insert_many(points, ordered=False)
+                written = len(result.inserted_ids)
+        except BulkWriteError as e:
+            written = e.details.get("nInserted", 0)
+            logger.error("Failed to write %d price points: %s",
+                         len(points) - written, e.details.get("writeErrors"))
+        except PyMongoError as e:
+            self._requeue(points, rollups)
+            if strict:
+                raise
+            logger.error("Failed to write %d price points, keeping them queued: %s", len(points), e)
+            return 0
+
+        operations = []
+        for (url, period, start), delta in rollups.items():
+            update = {"$set": {"source": delta["source"], "last_at": delta["last_at"]}}
+            update["$min"] = {f"min.{label}": v for label, v in delta["min"].items()}
+            update["$max"] = {f"max.{label}": v for label, v in delta["max"].items()}
+            update["$set"].update({f"last.{label}": v for label, v in delta["last"].items()})
+            operations.append(UpdateOne({"url": url, "period": period, "start": start}, update, upsert=True))
+        try:
+            await self.rollups.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            logger.error("Failed to update %d price rollups: %s",
+                         len(e.details.get("writeErrors", [])), e.details.get("writeErrors"))
+        except PyMongoError as e:
+            self._requeue([], rollups)
+            if strict:
+                raise
+            logger.error("Failed to update %d price rollups, keeping them queued: %s", len(operations), e)
+        return written
+
+    async def backfill(self, info_collection, batch_size: int = 1000) -> int:
+        """
+        Rebuilds points and rollups from the per-change history documents
+        written before the series existed. Only the replica holding the claim
+        on the marker runs it. Progress is saved after every batch, renewing
+        the claim, so a backfill interrupted by a restart resumes where it
+        stopped; once finished it is not run again.
+        """
+        if not self.enabled:
+            return 0
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stale = now - datetime.timedelta(seconds=self.claim_ttl)
+        state = await self.rollups.find_one_and_update(
+            {"_id": BACKFILL_ID, "done": False,
+             "$or": [{"owner": None}, {"owner": self.owner}, {"claimed_at": {"$lt": stale}}]},
+            {"$set": {"owner": self.owner, "claimed_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if state is None:
+            # Finished, or another replica is running it.
+            return 0
+
+        query = {"timestamp": {"$lt": state["until"]}}
+        if state.get("last_id") is not None:
+            ts, last_id = state["last_timestamp"], state["last_id"]
+            query = {"$and": [query, {"$or": [{"timestamp": {"$gt": ts}},
+                                              {"timestamp": ts, "_id": {"$gt": last_id}}]}]}
+            logger.info("Resuming the price history backfill after %s.", ts)
+
+        # A buffer of its own: a failed batch is replayed on resume, so it must
+        # not also stay queued with the live points.
+        batch = PriceHistory(self.get_db, self.points_retention_days, self.hourly_retention_days,
+                             self.max_time_ms, self.owner, self.claim_ttl)
+        total = 0
+        last = None
+        cursor = info_collection.find(query, allow_disk_use=True).sort(
+            [("timestamp", ASCENDING), ("_id", ASCENDING)])
+        async for document in cursor:
+            batch.add(document)
+            last = document
+            if len(batch) >= batch_size:
+                total += await batch.flush(strict=True)
+                if not await self._save_progress(last):
+                    logger.warning("Another replica took over the price history backfill after %d points.", total)
+                    return total
+        total += await batch.flush(strict=True)
+        await self.rollups.update_one({"_id": BACKFILL_ID, "owner": self.owner}, {"$set": {"done": True}})
+        logger.info("Backfilled %d price points into the time-series collection.", total)
+        return total
+
+    async def _save_progress(self, last: dict) -> bool:
+        """Records the last document backfilled and renews the claim. False once the claim is lost."""
+        result = await self.rollups.update_one(
+            {"_id": BACKFILL_ID, "owner": self.owner},
+            {"$set": {"last_timestamp": last["timestamp"], "last_id": last["_id"],
+                      "claimed_at": datetime.datetime.now(datetime.timezone.utc)}})
+        return result.matched_count > 0
+
+    async def series(
+        self,
+        url: str,
+        start: datetime.datetime,
+        end: Optional[datetime.datetime] = None,
+        resolution: Optional[str] = None,
+        max_time_ms: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Returns the price series of a URL in [start, end). Raw rows carry
+        `prices`; hourly and daily rows carry `min`, `max` and `last` per label.
+        The resolution defaults to the finest one that fits the range.
+        """
+        end = end or datetime.datetime.now(datetime.timezone.utc)
+        resolution = resolution or resolution_for(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}'")
+        max_time_ms = max_time_ms or self.max_time_ms
+
+        if resolution == RAW:
+            cursor = self.points.find(
+                {"meta.url": url, "timestamp": {"$gte": start, "$lt": end}},
+                {"_id": 0, "timestamp": 1, "prices": 1}
+            ).sort("timestamp", ASCENDING)
+        else:
+            cursor = self.rollups.find(
+                {"url": url, "period": resolution,
+                 "start": {"$gte": bucket_start(start, resolution), "$lt": end}},
+                {"_id": 0, "start": 1, "min": 1, "max": 1, "last": 1}
+            ).sort("start", ASCENDING)
+        return await cursor.max_time_ms(max_time_ms).to_list()
+
+    async def _price_before(self, url: str, start: datetime.datetime, max_time_ms: int) -> dict:
+        """Prices in effect at `start`: the last values of the newest earlier daily bucket."""
+        cursor = self.rollups.find(
+            {"url": url, "period": DAY, "start": {"$lt": bucket_start(start, DAY)}},
+            {"_id": 0, "last": 1}
+        ).sort("start", DESCENDING).limit(1)
+        rows = await cursor.max_time_ms(max_time_ms).to_list()
+        return rows[0]["last"] if rows else {}
+
+    async def summary(
+        self,
+        url: str,
+        start: datetime.datetime,
+        end: Optional[datetime.datetime] = None,
+        max_time_ms: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """
+        Min, max and last price per label for a URL over [start, end), e.g.
+        the lowest price in the last 90 days. The price in effect at `start`
+        counts towards the range. When a query exceeds its time budget the
+        next coarser resolution is used instead.
+        """
+        end = end or datetime.datetime.now(datetime.timezone.utc)
+        max_time_ms = max_time_ms or self.max_time_ms
+        resolutions = RESOLUTIONS[RESOLUTIONS.index(resolution_for(start, end)):]
+        rows = None
+        for resolution in resolutions:
+            try:
+                rows = await self.series(url, start, end, resolution, max_time_ms)
+                break
+            except ExecutionTimeout:
+                logger.warning("Price %s query for %s exceeded %dms, trying a coarser resolution.",
+                               resolution, url, max_time_ms)
+        if rows is None:
+            raise ExecutionTimeout(f"Price summary for {url} exceeded {max_time_ms}ms")
+
+        result: Dict[str, dict] = {}
+
+        def merge(label, low, high, last):
+            entry = result.setdefault(label, {"min": low, "max": high, "last": last})
+            entry["min"] = min(entry["min"], low)
+            entry["max"] = max(entry["max"], high)
+            entry["last"] = last
+
+        for label, value in (await self._price_before(url, start, max_time_ms)).items():
+            merge(label, value, value, value)
+        for row in rows:
+            if "prices" in row:
+                for label, value in row["prices"].items():
+                    merge(label, value, value, value)
+            else:
+                for label, value in row.get("last", {}).items():
+                    merge(label, row["min"].get(label, value), row["max"].get(label, value), value)
+        return result
+
+    async def lowest_price(self, url: str, label: str, days: int = 90) -> Optional[int]:
+        start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+        return (await self.summary(url, start)).get(label, {}).get("min")
@@ -1,89 +1,257 @@
+import asyncio
+import datetime
 import discord
 from discord.ext import tasks
-from app.services.database import get_all_urls, store_product_info
-from app.utils.price_comparer import get_previous_product_info
-from app.services.scrapers.falabella_scraper import FalabellaScraper
-from app.services.scrapers.paris_scraper import ParisScraper
-from app.services.scrapers.spdigital_scraper import SpDigitalScraper
-from app.utils.price_parser import parse_price
-from app.config import PRICE_FIELDS, PARIS_LABELS, FALABELLA_LABELS, CHANNEL_ID, SPDIGITAL_LABELS, service_name
+from app.services.database import (
+    get_due_urls, get_tracking_documents, record_scrape_results, count_recent_changes, latest_prices,
+    flush_price_writes, price_writes, cycle_checkpoints, url_leases, leader_lease, notification_outbox,
+    utcnow)
+from app.services.polling import polling_policy
+from app.services.scrapers.registry import registry
+from app.services.scrapers.fetch_stats import fetch_stats
+from app.services.scrapers.admission import browser_admission
+from app.services.scrapers.scrape_cache import scrape_cache
+from app.services.scheduler import domain_scheduler
+from app.services.loop_monitor import loop_monitor
+from app.services.watch_pipeline import WatchJob, WatchPipeline
+from app.services.notification_dispatcher import notification_dispatcher
+from app.config import (
+    CHANNEL_ID, CYCLE_CHECKPOINT_EVERY, POLL_TICK_MINUTES, WATCHER_MODE, REPLICA_ID, LEASE_TTL_SECONDS,
+    LEASE_BATCH_SIZE, service_name)
 from app.services.logger import get_logger
-from dateutil import parser
 
 logger = get_logger(service_name)
 
-
-def format_price(value: int) -> str:
-    return f"${value:,.0f}".replace(",", ".") if value else "Not available"
+# URLs due shortly after a tick are scraped in it rather than a full interval later.
+DUE_GRACE = datetime.timedelta(minutes=5)
 
 
 class PriceWatcher:
     def __init__(self, bot: discord.Client):
         self.bot = bot
         self.channel_id = CHANNEL_ID
-        self.scrapers = {
-            'paris': (ParisScraper(), PARIS_LABELS),
-            'falabella': (FalabellaScraper(), FALABELLA_LABELS),
-            'spdigital': (SpDigitalScraper(), SPDIGITAL_LABELS)
-        }
         self.channel = None
+        self._cycle_lock = asyncio.Lock()
+        self._checkpoint_lock = asyncio.Lock()
+        self._cycle: dict = {}
+        self._finished_jobs: list = []
+        self._intervals: list = []
+        self.distributed = WATCHER_MODE == "distributed"
+        # URLs this replica holds leases on, renewed while the cycle runs.
+        self._leased: set = set()
 
-    @tasks.loop(hours=2)
+    @tasks.loop(minutes=POLL_TICK_MINUTES)
     async def watch_prices(self):
         if self.channel is None:
             logger.error("Channel is None. Task cannot run.")
             return
 
-        urls_grouped = get_all_urls()
+        if self._cycle_lock.locked():
+            logger.warning("Previous price watch cycle is still running. Skipping this tick.")
+            return
+
+        async with self._cycle_lock:
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                # tasks.loop stops on errors it does not reconnect for, e.g. a dropped Mongo
+                # connection. The cycle's checkpoint stays, so the next tick resumes it.
+                logger.error("Error in price watch cycle: %s", e)
 
-        for source_group in urls_grouped:
-            source = source_group['source'].lower()
-            scraper, labels = self.scrapers.get(source, (None, None))
+    def build_jobs(self, docs: list) -> list:
+        """Builds a job for every tracking document that has a scraper."""
+        jobs = []
+        for doc in docs:
+            source = doc['source'].lower()
+            scraper = registry.get(source)
 
             if scraper is None:
                 logger.warning("No scraper found for source %s", source)
                 continue
 
-            for url in source_group['urls']:
-                await self.process_url(source, url, scraper, labels, self.channel)
+            jobs.append(WatchJob(source, doc['url'], scraper, scraper.labels, tracking=doc))
+        return jobs
 
-    async def process_url(self, source, url, scraper, labels, channel):
+    async def start_cycle(self) -> list:
+        """
+        Resumes the cycle a crash or restart left unfinished, or starts a new
+        one over every due URL (found with the next_due_at index). Returns its
+        jobs; when nothing is due no cycle is recorded and the list is empty.
+        """
+        self._cycle = {}
+        self._leased = set()
+        if self.distributed:
+            cycle = await cycle_checkpoints.resume(REPLICA_ID, stale_after=LEASE_TTL_SECONDS)
+        else:
+            cycle = await cycle_checkpoints.resume()
+        if cycle is not None:
+            if self.distributed:
+                docs = await url_leases.claim_urls(cycle["pending"])
+                self._leased.update(doc["url"] for doc in docs)
+            else:
+                docs = await get_tracking_documents(cycle["pending"])
+            jobs = self.build_jobs(docs)
+            logger.info("Resuming watcher cycle %s from %s: %d of %d URLs left (resume %d).",
+                        cycle["_id"], cycle["started_at"], len(cycle["pending"]),
+                        cycle["total"], cycle["resumes"])
+        else:
+            started = utcnow()
+            if self.distributed:
+                jobs = await self.claim_jobs()
+            else:
+                jobs = self.build_jobs(await get_due_urls(started + DUE_GRACE))
+            if not jobs:
+                logger.debug("No URLs are due, skipping this tick.")
+                return []
+            cycle = await cycle_checkpoints.start([job.url for job in jobs], started, owner=REPLICA_ID)
+            logger.info("Started watcher cycle %s with %d URLs.", cycle["_id"], len(jobs))
+        self._cycle = cycle
+        self._finished_jobs = []
+        self._intervals = []
+        return jobs
+
+    async def run_cycle(self):
+        """Runs every due URL through the watcher pipeline once, checkpointing as it goes."""
+        jobs = await self.start_cycle()
+        if not jobs and not self._cycle:
+            return
+        loop_monitor.reset()
+        pipeline = WatchPipeline(
+            self.channel, on_done=self.job_done,
+            more=self.claim_jobs if self.distributed else None,
+            notify=self.queue_notification if self.distributed else None)
+        renewer = asyncio.create_task(self.renew_leases()) if self.distributed else None
         try:
-            new_info = await scraper.get_product_info(url)
-            last_info = get_previous_product_info(url)
+            stats = await pipeline.run(jobs)
+        finally:
+            if renewer is not None:
+                renewer.cancel()
+        await self.checkpoint()
+        await cycle_checkpoints.finish(self._cycle["_id"], stats.as_dict())
 
-            if last_info is None:
-                store_product_info(source, url, new_info, labels)
-                return
+        logger.info("Price watch cycle %s finished: %s", self._cycle["_id"], stats.as_dict())
+        if stats.unchanged:
+            logger.info("Change detection skipped %d unchanged pages, saving ~%.1fs of parsing "
+                        "and %d price lookups.", stats.unchanged, stats.parse_time_saved, stats.unchanged)
+        interval = self.watch_prices.minutes * 60
+        if stats.wall_time > interval:
+            logger.warning("Price watch cycle took %.0fs, longer than the %.0fs tick.",
+                           stats.wall_time, interval)
+        fetch_stats.log_summary()
+        logger.info("Domain scheduler stats: %s", domain_scheduler.stats())
+        logger.info("Event loop lag during cycle: %s", loop_monitor.stats())
+        logger.info("Latest price cache: %s", latest_prices.stats())
+        logger.info("Price write buffer: %s", price_writes.stats())
+        logger.info("Scrape cache: %s", scrape_cache.stats())
+        logger.info("Browser admission: %s", browser_admission.stats())
+        logger.info("Notification dispatcher: %s", notification_dispatcher.stats())
+        if self._intervals:
+            intervals = sorted(self._intervals)
+            logger.info("Next polling intervals: min %.0fm, median %.0fm, max %.0fm.",
+                        intervals[0] / 60, intervals[len(intervals) // 2] / 60, intervals[-1] / 60)
 
-            embed_desc = ""
+    async def claim_jobs(self) -> list:
+        """
+        Distributed mode: leases the next batch of due URLs for this replica
+        and adds it to the running cycle. Returns an empty list when none are left.
+        """
+        while True:
+            docs = await url_leases.claim_due(utcnow() + DUE_GRACE, LEASE_BATCH_SIZE)
+            if not docs:
+                return []
+            # URLs without a scraper keep their lease until it expires, so they are not reclaimed.
+            jobs = self.build_jobs(docs)
+            if jobs:
+                break
+        self._leased.update(job.url for job in jobs)
+        if self._cycle:
+            await cycle_checkpoints.add(self._cycle["_id"], [job.url for job in jobs])
+            self._cycle["total"] += len(jobs)
+        logger.debug("Replica %s leased %d URLs.", REPLICA_ID, len(jobs))
+        return jobs
 
-            for field in PRICE_FIELDS:
-                label = labels.get(field, field)
-                new_price = parse_price(getattr(new_info, field))
-                old_price = last_info.get(label)
+    async def renew_leases(self) -> None:
+        """Renews this replica's URL leases and cycle heartbeat well before they expire."""
+        while True:
+            await asyncio.sleep(LEASE_TTL_SECONDS / 3)
+            try:
+                await url_leases.renew(self._leased)
+                if self._cycle:
+                    await cycle_checkpoints.heartbeat(self._cycle["_id"])
+            except Exception as e:
+                logger.error("Error renewing URL leases: %s", e)
 
-                if new_price != old_price and new_price is not None and old_price is not None:
-                    arrow = "🔻 Decreased" if new_price < old_price else "🔺 Increased"
-                    embed_desc += f"{arrow} **{label}** from {format_price(old_price)} to {format_price(new_price)}\n"
+    async def queue_notification(self, job: WatchJob) -> None:
+        """Distributed mode: the elected leader sends the change from the outbox."""
+        await notification_outbox.add(job.change)
 
-            if embed_desc:
-                ts = parser.parse(new_info.timestamp)
-                formatted_ts = ts.strftime("%d/%m/%Y %H:%M:%S")
+    async def job_done(self, job: WatchJob) -> None:
+        self._finished_jobs.append(job)
+        if len(self._finished_jobs) >= CYCLE_CHECKPOINT_EVERY:
+            await self.checkpoint()
 
-                embed = discord.Embed(
-                    title=f"{source.capitalize()} - {new_info.name}",
-                    description=embed_desc,
-                    url=url,
-                    color=0x3498db
-                )
-                embed.set_footer(text=f"Updated at {formatted_ts}")
+    async def checkpoint(self) -> None:
+        """
+        Makes the finished jobs durable: flushes their buffered prices, schedules
+        their next scrape and only then removes them from the cycle's pending URLs.
+        A crash repeats at most the jobs finished since the last checkpoint.
+        """
+        async with self._checkpoint_lock:
+            jobs, self._finished_jobs = self._finished_jobs, []
+            if not jobs:
+                return
+            try:
+                await flush_price_writes()
+                results = await self.schedule_next(jobs, utcnow())
+                urls = [job.url for job in jobs]
+                await cycle_checkpoints.complete(
+                    self._cycle["_id"], urls, failed=sum(not r["succeeded"] for r in results))
+            except Exception:
+                # Still pending in the cycle document; kept so the next checkpoint retries them.
+                self._finished_jobs[:0] = jobs
+                raise
+            if self.distributed:
+                await url_leases.release(urls)
+                self._leased.difference_update(urls)
+            self._intervals.extend(r["poll_interval_s"] for r in results)
+            self._cycle["completed"] += len(jobs)
+            logger.info("Watcher cycle %s: %d/%d URLs done.",
+                        self._cycle["_id"], self._cycle["completed"], self._cycle["total"])
 
-                await channel.send(embed=embed)
-                store_product_info(source, url, new_info, labels)
+    async def schedule_next(self, jobs: list, started: datetime.datetime) -> list:
+        """Gives every scraped URL its next due time from its observed change rate."""
+        changes = await count_recent_changes(
+            (job.url for job in jobs), started - polling_policy.lookback)
+        results = []
+        for job in jobs:
+            result = polling_policy.schedule(job.tracking, job.url, job.scraped, job.changed,
+                                             changes.get(job.url, 0), started)
+            result.update(content_hash=job.content_hash, hash_skips=job.hash_skips)
+            results.append(result)
+        await record_scrape_results(results)
+        return results
 
+    @tasks.loop(seconds=LEASE_TTL_SECONDS / 10)
+    async def lead(self):
+        """
+        Distributed mode: keeps trying to hold the leader lease; the leader
+        sends the queued notifications, so each change goes out once.
+        """
+        try:
+            if not await leader_lease.acquire() or self.channel is None:
+                return
+            sent = await notification_outbox.drain(
+                lambda change: notification_dispatcher.submit(self.channel, change, key=change.url))
+            if sent:
+                logger.info("Sent %d queued notifications as leader.", sent)
         except Exception as e:
-            logger.error("Error while processing URL %s: %s", url, e)
+            logger.error("Error in leader loop: %s", e)
+
+    @lead.before_loop
+    async def before_lead(self):
+        await self.bot.wait_until_ready()
+        if self.channel is None:
+            self.channel = await self.bot.fetch_channel(self.channel_id)
 
     @watch_prices.before_loop
     async def before_watch_prices(self):
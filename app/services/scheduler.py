@@ -0,0 +1,120 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+from app.config import (
+    RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_CONCURRENCY, DOMAIN_RATE_LIMITS)
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be greater than 0, got {rate}.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Takes one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= 1
+        return waited
+
+
+class DomainLimiter:
+    """Token bucket plus concurrency cap for a single retailer host."""
+
+    def __init__(self, domain: str, rps: float, burst: int, concurrency: int) -> None:
+        self.domain = domain
+        self.bucket = TokenBucket(rps, burst)
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.in_flight = 0
+        self.completed = 0
+        self.throttled_seconds = 0.0
+
+
+class DomainScheduler:
+    """
+    Central per-domain scheduler for outgoing fetches. Different retailers
+    proceed in parallel while each host stays within its own rate and
+    concurrency limits.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, dict]] = None,
+        default_rps: float = RATE_LIMIT_RPS,
+        default_burst: int = RATE_LIMIT_BURST,
+        default_concurrency: int = RATE_LIMIT_CONCURRENCY
+    ) -> None:
+        self.limits = DOMAIN_RATE_LIMITS if limits is None else limits
+        self.default = {"rps": default_rps, "burst": default_burst,
+                        "concurrency": default_concurrency}
+        for domain, conf in {"default": self.default, **self.limits}.items():
+            if conf.get("rps", default_rps) <= 0:
+                raise ValueError(f"Rate limit for {domain} must be greater than 0 rps.")
+        self._limiters: Dict[str, DomainLimiter] = {}
+
+    def _domain_for(self, url: str) -> str:
+        host = (urlparse(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        for domain in self.limits:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        return host
+
+    def limiter_for(self, url: str) -> DomainLimiter:
+        domain = self._domain_for(url)
+        limiter = self._limiters.get(domain)
+        if limiter is None:
+            conf = {**self.default, **self.limits.get(domain, {})}
+            limiter = DomainLimiter(domain, conf["rps"], conf["burst"], conf["concurrency"])
+            self._limiters[domain] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Holds a concurrency slot and a rate token for the URL's domain."""
+        limiter = self.limiter_for(url)
+        async with limiter.semaphore:
+            limiter.throttled_seconds += await limiter.bucket.acquire()
+            limiter.in_flight += 1
+            try:
+                yield
+            finally:
+                limiter.in_flight -= 1
+                limiter.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            domain: {
+                "in_flight": limiter.in_flight,
+                "completed": limiter.completed,
+                "throttled_seconds": round(limiter.throttled_seconds, 1)
+            }
+            for domain, limiter in self._limiters.items()
+        }
+
+
+domain_scheduler = DomainScheduler()
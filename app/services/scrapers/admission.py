@@ -0,0 +1,257 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+from app.config import (
+    BROWSER_POOL_SIZE, BROWSER_MEMORY_TARGET, BROWSER_MEMORY_CRITICAL, BROWSER_SESSION_MEMORY_MB,
+    BROWSER_ADMISSION_MAX_QUEUE, BROWSER_ADMISSION_MAX_WAIT)
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# cgroup v1 reports "no limit" as a huge number rather than "max".
+UNLIMITED = 1 << 60
+CHROMIUM_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+class AdmissionRejected(Exception):
+    """A browser session was shed because memory pressure stayed high."""
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _inactive_file(stat_path: str) -> int:
+    for line in (_read(stat_path) or "").splitlines():
+        key, _, value = line.partition(" ")
+        if key in ("inactive_file", "total_inactive_file"):
+            return int(value)
+    return 0
+
+
+def container_memory() -> Tuple[int, int]:
+    """
+    (limit, used) bytes for the container: cgroup v2, then v1, then the host's
+    /proc/meminfo. Reclaimable page cache is not counted as used, matching
+    what the OOM killer sees.
+    """
+    for limit_path, usage_path, stat_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory.stat"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+         "/sys/fs/cgroup/memory/memory.stat"),
+    ):
+        limit, usage = _read(limit_path), _read(usage_path)
+        if limit is None or usage is None or limit == "max" or int(limit) >= UNLIMITED:
+            continue
+        return int(limit), max(0, int(usage) - _inactive_file(stat_path))
+
+    meminfo = {}
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        meminfo[key] = int(value.split()[0]) * 1024
+    total = meminfo.get("MemTotal", 0)
+    return total, total - meminfo.get("MemAvailable", total)
+
+
+def chromium_rss() -> int:
+    """Summed RSS of Chromium processes descending from this one, read from /proc."""
+    parents: Dict[int, int] = {}
+    rss: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if not entry.isdigit():
+            continue
+        stat = _read(f"/proc/{entry}/stat")
+        if stat is None:
+            continue
+        # The command name is parenthesised and may contain spaces.
+        name = stat[stat.find("(") + 1:stat.rfind(")")]
+        fields = stat[stat.rfind(")") + 2:].split()
+        pid = int(entry)
+        parents[pid] = int(fields[1])
+        rss[pid] = int(fields[21]) * PAGE_SIZE
+        names[pid] = name.lower()
+
+    root = os.getpid()
+    total = 0
+    for pid in rss:
+        if not any(n in names[pid] for n in CHROMIUM_NAMES):
+            continue
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != root:
+            ancestor = parents.get(ancestor)
+        if ancestor == root:
+            total += rss[pid]
+    return total
+
+
+def read_memory() -> Tuple[int, int, int]:
+    """(limit, used, chromium RSS) in bytes. Blocking: scans /proc."""
+    limit, used = container_memory()
+    return limit, used, chromium_rss()
+
+
+class AdmissionController:
+    """
+    Admits browser sessions while memory allows. The number of concurrent
+    sessions is capped by the browser pool size and by how many more sessions
+    fit under `target` × the container memory limit, estimating a session's
+    cost from the live Chromium RSS (or `session_mb` before any has run).
+    Sessions over the cap queue behind earlier ones; above `critical` only one
+    session runs at a time. While memory is above `target`, new sessions beyond
+    `max_queue` waiters, and waiters older than `max_wait` seconds, are shed
+    with AdmissionRejected instead of queueing.
+
+    Memory is read by a background task every `sample_interval` seconds in a
+    worker thread, so admission and /status never scan /proc on the loop.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = BROWSER_POOL_SIZE,
+        target: float = BROWSER_MEMORY_TARGET,
+        critical: float = BROWSER_MEMORY_CRITICAL,
+        session_mb: int = BROWSER_SESSION_MEMORY_MB,
+        max_queue: int = BROWSER_ADMISSION_MAX_QUEUE,
+        max_wait: float = BROWSER_ADMISSION_MAX_WAIT,
+        sample_interval: float = 1.0
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.target = target
+        self.critical = max(critical, target)
+        self.session_bytes = session_mb * MB
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.sample_interval = sample_interval
+        self.in_flight = 0
+        self.waiting = 0
+        self._changed: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sampled_at = 0.0
+        self._sample = (0, 0, 0)
+        self.admitted = 0
+        self.shed = 0
+        self.delayed = 0
+        self.peak_used = 0
+        self.peak_chromium = 0
+        self.peak_waiting = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Error reading memory usage: %s", e)
+            await asyncio.sleep(self.sample_interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> Tuple[int, int, int]:
+        """Re-reads memory in a worker thread and caches it for sample()."""
+        limit, used, chromium = await asyncio.to_thread(read_memory)
+        self._sample = (limit, used, chromium)
+        self._sampled_at = time.monotonic()
+        self.peak_used = max(self.peak_used, used)
+        self.peak_chromium = max(self.peak_chromium, chromium)
+        return self._sample
+
+    def sample(self) -> Tuple[int, int, int]:
+        """(limit, used, chromium RSS) in bytes, as last read by the background task."""
+        return self._sample
+
+    def under_pressure(self) -> bool:
+        limit, used, _ = self.sample()
+        return bool(limit) and used >= limit * self.target
+
+    def capacity(self) -> int:
+        """How many sessions may run at once under the current memory reading."""
+        limit, used, chromium = self.sample()
+        if not limit:
+            return self.max_sessions
+        if used >= limit * self.critical:
+            return 1
+        per_session = max(self.session_bytes, chromium // self.in_flight if self.in_flight else 0)
+        headroom = limit * self.target - used
+        return max(1, min(self.max_sessions, self.in_flight + int(headroom // per_session)))
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[None]:
+        """Holds an admitted browser session for the duration of the block."""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self.start()
+        if not self._sampled_at:
+            await self.refresh()
+        if self.waiting or self.in_flight >= self.capacity():
+            await self._wait()
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            async with self._changed:
+                self._changed.notify()
+
+    async def _wait(self) -> None:
+        if self.waiting >= self.max_queue and self.under_pressure():
+            self.shed += 1
+            raise AdmissionRejected(f"Browser admission queue is full ({self.waiting} waiting)")
+        self.waiting += 1
+        self.delayed += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        deadline = time.monotonic() + self.max_wait
+        try:
+            async with self._changed:
+                # Memory can drop without a release, so the cap is re-read periodically.
+                while self.in_flight >= self.capacity():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 and self.under_pressure():
+                        self.shed += 1
+                        raise AdmissionRejected(
+                            f"Waited {self.max_wait:.0f}s for browser admission under memory pressure")
+                    timeout = min(remaining, self.sample_interval) if remaining > 0 else self.sample_interval
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> dict:
+        limit, used, chromium = self.sample()
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "delayed": self.delayed,
+            "shed": self.shed,
+            "limit_mb": limit // MB,
+            "used_mb": used // MB,
+            "peak_used_mb": self.peak_used // MB,
+            "chromium_mb": chromium // MB,
+            "peak_chromium_mb": self.peak_chromium // MB
+        }
+
+
+browser_admission = AdmissionController()
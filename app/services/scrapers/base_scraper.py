@@ -1,13 +1,48 @@
-import asyncio
-import random
+import time
 from datetime import datetime, timezone
 from typing import Optional
-from playwright.async_api import async_playwright
-from app.config import HEADERS
+from app.config import PRICE_FIELDS
+from app.services.scheduler import domain_scheduler
+from app.services.scrapers.admission import browser_admission
+from app.services.scrapers.browser_pool import browser_pool
+from app.services.scrapers.http_client import http_client
+from app.services.scrapers.navigation import NavigationProfile
+from app.services.scrapers.parse_pool import parse_pool
+from app.services.scrapers.fetch_stats import fetch_stats, HTTP_HIT, HTTP_FALLBACK, BROWSER_FETCH
 from app.services.logger import get_logger
+from app.utils.price_parser import parse_price
 
 logger = get_logger(__name__)
 
+FETCH_TIER_HTTP = "http"
+FETCH_TIER_BROWSER = "browser"
+
+BOT_WALL_STATUSES = (403, 429, 503)
+# Found only on challenge or block pages. Generic words such as "captcha" are
+# not: product pages load reCAPTCHA for login or newsletter widgets, and
+# Cloudflare adds its challenge-platform script to ordinary pages.
+BOT_WALL_MARKERS = (
+    'id="challenge-form"',
+    "_cf_chl_opt",
+    "<title>just a moment...</title>",
+    'id="px-captcha"',
+    "geo.captcha-delivery.com",
+    "<title>access denied</title>",
+    "incapsula incident id"
+)
+
+
+class PageRetrievalError(Exception):
+    pass
+
+
+def looks_like_bot_wall(html: str, status: int = 200) -> bool:
+    """Detects captcha, challenge or block pages served instead of the product."""
+    if status in BOT_WALL_STATUSES:
+        return True
+    lowered = html.lower()
+    return any(marker in lowered for marker in BOT_WALL_MARKERS)
+
 
 class ProductInfo:
     """Data class for storing product information."""
@@ -18,13 +53,20 @@ class ProductInfo:
         price1: Optional[str] = None,
         price2: Optional[str] = None,
         price3: Optional[str] = None,
-        timestamp: Optional[str] = None
+        timestamp: Optional[str] = None,
+        extracted_from: Optional[str] = None
     ) -> None:
         self.name = name
         self.price1 = price1
         self.price2 = price2
         self.price3 = price3
         self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        # Which extraction path produced the fields, e.g. "json" or "dom".
+        self.extracted_from = extracted_from
+
+    def has_prices(self) -> bool:
+        """True when at least one price field parses to a number."""
+        return any(parse_price(getattr(self, field)) for field in PRICE_FIELDS)
 
     def __repr__(self) -> str:
         parts = []
@@ -36,30 +78,84 @@ class ProductInfo:
 
 
 class BaseScraper:
-    """Base class: fetches HTML via Playwright and injects headers/random delay."""
+    """
+    Base class: fetches HTML over plain HTTP or through the shared browser pool,
+    each fetch holding a slot from the per-domain scheduler and each browser
+    fetch first being admitted by the memory-aware admission controller. Scrapers preferring
+    FETCH_TIER_HTTP only escalate to the browser when the HTTP response is a
+    block status or parses without prices; the body is only checked for a bot
+    wall once the parse found none.
+    """
+
+    source = "base"
+    fetch_tier = FETCH_TIER_BROWSER
+    navigation_profile = NavigationProfile()
+
+    async def get_http_source(self, url: str) -> str:
+        async with domain_scheduler.slot(url):
+            status, html = await http_client.fetch(url)
+        if status in BOT_WALL_STATUSES:
+            raise PageRetrievalError(f"Block page (HTTP {status}): {url}")
+        return html
 
     async def get_page_source(self, url: str) -> str:
-        await asyncio.sleep(random.uniform(1, 3))
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=HEADERS["User-Agent"],
-                extra_http_headers=HEADERS
-            )
-            page = await context.new_page()
-            await page.goto(url, timeout=60_000)
-            content = await page.content()
-            await browser.close()
-            return content
+        profile = self.navigation_profile
+        # Admission first, so a queued session does not hold the domain's slot.
+        async with browser_admission.session(), domain_scheduler.slot(url):
+            started = time.perf_counter()
+            async with browser_pool.page() as page:
+                traffic = await profile.prepare(page)
+                await page.goto(url, wait_until=profile.wait_until, timeout=profile.timeout)
+                await profile.wait_until_ready(page)
+                html = await page.content()
+        fetch_stats.record_browser_time(time.perf_counter() - started)
+        fetch_stats.record_page_traffic(self.source, traffic)
+        logger.debug("Loaded %s: %s", url, traffic)
+        return html
+
+    async def _get_product_info_http(self, url: str) -> Optional[ProductInfo]:
+        try:
+            html = await self.get_http_source(url)
+            info = await self.run_parse(url, html)
+        except Exception as e:
+            logger.debug("HTTP tier failed for %s: %s", url, e)
+            return None
+        if not info.has_prices():
+            if looks_like_bot_wall(html):
+                logger.debug("HTTP tier got a bot wall for %s", url)
+            else:
+                logger.debug("HTTP tier returned no prices for %s", url)
+            return None
+        return info
 
     async def get_product_info(self, url: str) -> ProductInfo:
         """
-        Fetches the page and then calls parse() to extract name + price1/2/3.
-        Subclasses **must** override parse(html)->ProductInfo.
+        Fetches the page and then calls parse() in the parse pool to extract
+        name + price1/2/3. Subclasses **must** override parse(html)->ProductInfo.
         """
+        if self.fetch_tier == FETCH_TIER_HTTP:
+            info = await self._get_product_info_http(url)
+            if info is not None:
+                fetch_stats.record(self.source, HTTP_HIT)
+                return info
+            fetch_stats.record(self.source, HTTP_FALLBACK)
+
         html = await self.get_page_source(url)
-        return self.parse(html)
+        fetch_stats.record(self.source, BROWSER_FETCH)
+        return await self.run_parse(url, html)
+
+    async def run_parse(self, url: str, html: str) -> ProductInfo:
+        """Parses in the parse pool and records which extraction path served the page."""
+        info = await parse_pool.parse(self, html)
+        if info.extracted_from:
+            fetch_stats.record(self.source, f"extract_{info.extracted_from}")
+            logger.debug("Extracted %s via %s", url, info.extracted_from)
+        return info
 
     def parse(self, html: str) -> ProductInfo:
         """Override in subclasses to extract ProductInfo from HTML."""
         raise NotImplementedError("Scraper must implement parse()")
+
+    def fingerprint(self, html: str) -> Optional[str]:
+        """Digest of the page's price regions, or None to always parse."""
+        return None
@@ -0,0 +1,144 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from playwright.async_api import Error as PlaywrightError
+from app.config import HEADERS, BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, BROWSER_CLOSE_TIMEOUT
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PooledBrowser:
+    """A single Chromium instance together with its recycled context."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.pages_served = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Long-lived pool of headless Chromium instances shared by every scraper.
+    Each browser serves one page at a time, is relaunched if it crashes and
+    is retired after `max_pages` pages to keep memory growth in check.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES) -> None:
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._playwright: Optional[Playwright] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[PooledBrowser] = []
+        self._start_lock = asyncio.Lock()
+        self.launches = 0
+        self.restarts = 0
+        self.retirements = 0
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            self._playwright = await async_playwright().start()
+            self._idle = asyncio.Queue()
+            self._slots = [PooledBrowser(i) for i in range(self.size)]
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+            logger.info("Browser pool started with %d browsers (max %d pages each).",
+                        self.size, self.max_pages)
+
+    async def _launch(self, slot: PooledBrowser) -> None:
+        slot.browser = await self._playwright.chromium.launch(headless=True)
+        slot.context = await slot.browser.new_context(
+            user_agent=HEADERS["User-Agent"],
+            extra_http_headers=HEADERS
+        )
+        slot.pages_served = 0
+        self.launches += 1
+        logger.debug("Launched browser %d.", slot.index)
+
+    async def _shutdown(self, slot: PooledBrowser) -> None:
+        if slot.browser is not None:
+            try:
+                await slot.browser.close()
+            except PlaywrightError as e:
+                logger.debug("Error closing browser %d: %s", slot.index, e)
+        slot.browser = None
+        slot.context = None
+
+    async def _ensure_ready(self, slot: PooledBrowser) -> None:
+        if slot.browser is not None and (not slot.alive or slot.context is None):
+            logger.warning("Browser %d is no longer connected, restarting.", slot.index)
+            self.restarts += 1
+            await self._shutdown(slot)
+        elif slot.pages_served >= self.max_pages:
+            logger.debug("Retiring browser %d after %d pages.",
+                         slot.index, slot.pages_served)
+            self.retirements += 1
+            await self._shutdown(slot)
+
+        if slot.browser is None:
+            await self._launch(slot)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Checks out a browser and yields a fresh page from its recycled context."""
+        if self._playwright is None:
+            await self.start()
+
+        # Returned to the queue it came from, even if the pool was closed meanwhile.
+        idle = self._idle
+        slot = await idle.get()
+        page = None
+        try:
+            await self._ensure_ready(slot)
+            page = await slot.context.new_page()
+            slot.pages_served += 1
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except PlaywrightError as e:
+                    logger.debug("Error closing page on browser %d: %s", slot.index, e)
+            idle.put_nowait(slot)
+
+    async def _drain(self) -> None:
+        for _ in range(self.size):
+            await self._idle.get()
+
+    async def close(self, timeout: float = BROWSER_CLOSE_TIMEOUT) -> None:
+        """
+        Waits up to `timeout` seconds for in-flight pages to be returned, then
+        shuts every browser down, including ones a stuck page still holds.
+        """
+        if self._playwright is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Browser pages still in use after %gs, closing their browsers anyway.", timeout)
+        for slot in self._slots:
+            await self._shutdown(slot)
+        await self._playwright.stop()
+        self._playwright = None
+        self._idle = None
+        self._slots = []
+        logger.info("Browser pool closed.")
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "launches": self.launches,
+            "restarts": self.restarts,
+            "retirements": self.retirements
+        }
+
+
+browser_pool = BrowserPool()
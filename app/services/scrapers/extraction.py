@@ -0,0 +1,121 @@
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@lru_cache(maxsize=256)
+def css(selector: str) -> CSSSelector:
+    """Returns a compiled, cached CSS selector."""
+    return CSSSelector(selector)
+
+
+@lru_cache(maxsize=256)
+def xpath(expression: str) -> etree.XPath:
+    """Returns a compiled, cached XPath expression."""
+    return etree.XPath(expression)
+
+
+def text_of(element) -> Optional[str]:
+    """Same result as BeautifulSoup's get_text(strip=True)."""
+    if element is None:
+        return None
+    return "".join(part.strip() for part in element.itertext())
+
+
+def parse_html(html: str):
+    """Parses a whole document once with lxml and returns its root element."""
+    return lxml.html.document_fromstring(html)
+
+
+def _is_open_tag(html: str, pos: int, tag: str) -> bool:
+    end = pos + 1 + len(tag)
+    return html.startswith(tag, pos + 1) and end < len(html) and html[end] in " \t\r\n/>"
+
+
+def _element_end(html: str, start: int, tag: str) -> int:
+    """Returns the index just past the matching closing tag, or -1."""
+    open_marker = "<" + tag
+    close_marker = "</" + tag
+    depth = 0
+    pos = start
+    while True:
+        next_open = html.find(open_marker, pos)
+        next_close = html.find(close_marker, pos)
+        if next_close == -1:
+            return -1
+        if next_open != -1 and next_open < next_close:
+            if _is_open_tag(html, next_open, tag):
+                depth += 1
+            pos = next_open + len(open_marker)
+            continue
+        if not _is_open_tag(html, next_close + 1, tag):
+            pos = next_close + len(close_marker)
+            continue
+        depth -= 1
+        end = html.find(">", next_close)
+        if end == -1:
+            return -1
+        pos = end + 1
+        if depth == 0:
+            return pos
+
+
+def _class_matches(element, class_marker: str, exact: bool) -> bool:
+    classes = (element.get("class") or "").split()
+    if exact:
+        return class_marker in classes
+    return any(class_marker in c for c in classes)
+
+
+def iter_regions(html: str, tag: str, class_marker: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (start, end) offsets of `<tag>` elements whose opening tag contains
+    `class_marker`, found with string search only.
+    """
+    pos = 0
+    while True:
+        idx = html.find(class_marker, pos)
+        if idx == -1:
+            return
+        pos = idx + len(class_marker)
+
+        start = html.rfind("<", 0, idx)
+        if start == -1 or not _is_open_tag(html, start, tag) or html.find(">", start, idx) != -1:
+            continue
+
+        end = _element_end(html, start, tag)
+        if end != -1:
+            yield start, end
+
+
+def iter_elements(html: str, tag: str, class_marker: str, exact: bool = False) -> Iterator:
+    """
+    Streams `<tag>` elements whose class contains `class_marker` (or equals
+    one of its classes when `exact`) without parsing the rest of the document.
+    Only the slice holding each candidate element is handed to lxml.
+    """
+    matched_end = 0
+    for start, end in iter_regions(html, tag, class_marker):
+        # Markers inside an element that already matched belong to its children.
+        if start < matched_end:
+            continue
+
+        try:
+            element = lxml.html.fragment_fromstring(html[start:end])
+        except (etree.ParserError, ValueError) as e:
+            logger.debug("Could not parse <%s> region: %s", tag, e)
+            continue
+
+        if element.tag == tag and _class_matches(element, class_marker, exact):
+            yield element
+            matched_end = end
+
+
+def find_element(html: str, tag: str, class_marker: str, exact: bool = False):
+    """Returns the first matching element from iter_elements(), or None."""
+    return next(iter_elements(html, tag, class_marker, exact), None)
@@ -0,0 +1,59 @@
+from collections import Counter, defaultdict
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+HTTP_HIT = "http_hit"
+HTTP_FALLBACK = "http_fallback"
+BROWSER_FETCH = "browser_fetch"
+
+
+class FetchStats:
+    """Per-source counters for the tiered fetcher plus browser timing."""
+
+    def __init__(self) -> None:
+        self.counters = defaultdict(Counter)
+        self.browser_seconds = 0.0
+        self.browser_fetches = 0
+        self.page_bytes = defaultdict(int)
+        self.page_loads = defaultdict(int)
+
+    def record(self, source: str, event: str) -> None:
+        self.counters[source][event] += 1
+
+    def record_browser_time(self, seconds: float) -> None:
+        self.browser_seconds += seconds
+        self.browser_fetches += 1
+
+    def record_page_traffic(self, source: str, traffic) -> None:
+        self.page_bytes[source] += traffic.bytes
+        self.page_loads[source] += 1
+
+    def average_page_bytes(self, source: str) -> int:
+        if not self.page_loads[source]:
+            return 0
+        return self.page_bytes[source] // self.page_loads[source]
+
+    def average_browser_seconds(self) -> float:
+        if not self.browser_fetches:
+            return 0.0
+        return self.browser_seconds / self.browser_fetches
+
+    def browser_seconds_saved(self) -> float:
+        """Estimates the browser time avoided by pages served over plain HTTP."""
+        hits = sum(c[HTTP_HIT] for c in self.counters.values())
+        return hits * self.average_browser_seconds()
+
+    def summary(self) -> dict:
+        return {
+            "sources": {source: dict(c) for source, c in self.counters.items()},
+            "avg_page_bytes": {source: self.average_page_bytes(source) for source in self.page_loads},
+            "avg_browser_seconds": round(self.average_browser_seconds(), 2),
+            "browser_seconds_saved": round(self.browser_seconds_saved(), 1)
+        }
+
+    def log_summary(self) -> None:
+        logger.info("Fetch tier stats: %s", self.summary())
+
+
+fetch_stats = FetchStats()
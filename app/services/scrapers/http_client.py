@@ -0,0 +1,46 @@
+from typing import Optional, Tuple
+import httpx
+from app.config import HEADERS, HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+# httpx only decodes zstd when the optional zstandard package is installed,
+# so the fast path advertises the encodings it can always decode.
+HTTP_HEADERS = {**HEADERS, "Accept-Encoding": "gzip, deflate"}
+
+
+class HttpClient:
+    """Pooled async HTTP client used by the plain-HTTP fetch tier."""
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, max_connections: int = HTTP_MAX_CONNECTIONS) -> None:
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HTTP_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Tuple[int, str]:
+        """Returns the status code and decoded body for the given URL."""
+        response = await self._get_client().get(url)
+        return response.status_code, response.text
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("HTTP client closed.")
+
+
+http_client = HttpClient()
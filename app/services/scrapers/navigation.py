@@ -0,0 +1,139 @@
+import json
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page, Route, Request
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet")
+
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "criteo.net",
+    "tiktok.com",
+    "nr-data.net",
+    "newrelic.com",
+    "segment.io",
+    "bing.com",
+    "youtube.com"
+)
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class PageTraffic:
+    """Bytes and request counts observed while loading a single page."""
+
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.requests = 0
+        self.blocked = 0
+
+    def __repr__(self) -> str:
+        return f"PageTraffic(bytes={self.bytes}, requests={self.requests}, blocked={self.blocked})"
+
+
+class NavigationProfile:
+    """
+    Per-site navigation settings: which requests to abort, which load event
+    to wait for and which selectors or JS conditions mean the prices are ready.
+    """
+
+    def __init__(
+        self,
+        wait_until: str = "domcontentloaded",
+        blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+        first_party_domains: Iterable[str] = (),
+        block_trackers: bool = True,
+        ready_selectors: Iterable[str] = (),
+        ready_conditions: Iterable[str] = (),
+        ready_timeout: int = 15_000,
+        timeout: int = 60_000
+    ) -> None:
+        self.wait_until = wait_until
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.first_party_domains = tuple(first_party_domains)
+        self.block_trackers = block_trackers
+        self.ready_selectors = tuple(ready_selectors)
+        self.ready_conditions = tuple(ready_conditions)
+        self.ready_timeout = ready_timeout
+        self.timeout = timeout
+
+    @classmethod
+    def unrestricted(cls) -> "NavigationProfile":
+        """Full `load` navigation with nothing blocked, used as a baseline."""
+        return cls(wait_until="load", blocked_resource_types=(), block_trackers=False)
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.blocked_resource_types or self.first_party_domains or self.block_trackers)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type == "document":
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        host = urlparse(url).hostname or ""
+        if self.block_trackers and _host_matches(host, TRACKER_DOMAINS):
+            return True
+        if self.first_party_domains and not _host_matches(host, self.first_party_domains):
+            return True
+        return False
+
+    def ready_script(self) -> Optional[str]:
+        checks = [f"document.querySelector({json.dumps(sel)})" for sel in self.ready_selectors]
+        checks.extend(self.ready_conditions)
+        if not checks:
+            return None
+        return "() => Boolean(" + " || ".join(checks) + ")"
+
+    async def prepare(self, page: Page) -> PageTraffic:
+        """Installs request interception and byte accounting on a fresh page."""
+        traffic = PageTraffic()
+
+        if self.intercepts:
+            async def handle(route: Route, request: Request) -> None:
+                if self.should_block(request.resource_type, request.url):
+                    traffic.blocked += 1
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await page.route("**/*", handle)
+
+        try:
+            cdp = await page.context.new_cdp_session(page)
+
+            def on_finished(event: dict) -> None:
+                traffic.requests += 1
+                traffic.bytes += int(event.get("encodedDataLength", 0))
+
+            cdp.on("Network.loadingFinished", on_finished)
+            await cdp.send("Network.enable")
+        except PlaywrightError as e:
+            logger.debug("Byte accounting unavailable: %s", e)
+
+        return traffic
+
+    async def wait_until_ready(self, page: Page) -> None:
+        """Waits for a price selector or JS condition, if the profile defines any."""
+        script = self.ready_script()
+        if script is None:
+            return
+        try:
+            await page.wait_for_function(script, timeout=self.ready_timeout)
+        except PlaywrightTimeoutError:
+            logger.debug("Ready condition not met within %d ms on %s",
+                         self.ready_timeout, page.url)
@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from app.config import PARSE_EXECUTOR, PARSE_WORKERS, PARSE_MAX_TASKS_PER_WORKER
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _warm_up() -> None:
+    """Worker initializer: compiles the scraper specs once per process."""
+    import app.services.scrapers.registry  # noqa: F401
+
+
+def _ping() -> None:
+    return None
+
+
+def _run_parse(scraper, html: str):
+    return scraper.parse(html)
+
+
+class ParsePool:
+    """
+    Runs scraper.parse() outside the event loop. Scrapers and ProductInfo are
+    plain picklable objects, so the HTML goes to a warm worker process and
+    the ProductInfo comes back. The whole pool is replaced after
+    `max_tasks` tasks per worker, which recycles every worker process.
+    """
+
+    def __init__(
+        self,
+        mode: str = PARSE_EXECUTOR,
+        workers: int = PARSE_WORKERS,
+        max_tasks: int = PARSE_MAX_TASKS_PER_WORKER
+    ) -> None:
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_tasks = max(1, max_tasks)
+        self._executor: Optional[Executor] = None
+        self._tasks = 0
+        self.recycles = 0
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "process":
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up
+                )
+                for _ in range(self.workers):
+                    executor.submit(_ping)
+                return executor
+            except (OSError, NotImplementedError) as e:
+                logger.warning("Process pool unavailable (%s), parsing in threads.", e)
+                self.mode = "thread"
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._create_executor()
+        elif self._tasks >= self.max_tasks * self.workers:
+            old = self._executor
+            self._executor = self._create_executor()
+            self._tasks = 0
+            self.recycles += 1
+            old.shutdown(wait=False)
+            logger.debug("Recycled parse workers (generation %d).", self.recycles)
+        self._tasks += 1
+        return self._executor
+
+    def start(self) -> None:
+        """Spawns the workers ahead of the first parse."""
+        if self.mode != "inline" and self._executor is None:
+            self._executor = self._create_executor()
+
+    async def parse(self, scraper, html: str):
+        if self.mode == "inline":
+            return scraper.parse(html)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), _run_parse, scraper, html)
+        except BrokenProcessPool:
+            logger.warning("Parse worker died, restarting the pool.")
+            self._executor = None
+            return await loop.run_in_executor(self._get_executor(), _run_parse, scraper, html)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from app.services.scrapers.spec_scraper import SiteSpec, SpecScraper, SpecError
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+SPECS_DIR = Path(__file__).parent / "specs"
+
+
+class ScraperRegistry:
+    """
+    Retailer specs from specs/*.json, compiled once into SpecScrapers. Lookups
+    by source key and by host are dict hits; a host is matched against its own
+    name and then each parent domain, so www.falabella.com finds falabella.com.
+    """
+
+    def __init__(self, specs_dir: Path = SPECS_DIR) -> None:
+        self._by_key: Dict[str, SpecScraper] = {}
+        self._by_domain: Dict[str, SpecScraper] = {}
+        for path in sorted(specs_dir.glob("*.json")):
+            with path.open(encoding="utf-8") as f:
+                self.register(SiteSpec(path.stem.lower(), json.load(f)))
+        logger.debug("Loaded %d scraper specs: %s", len(self._by_key), ", ".join(self._by_key))
+
+    def register(self, spec: SiteSpec) -> SpecScraper:
+        if spec.key in self._by_key:
+            raise SpecError(f"Duplicate scraper spec '{spec.key}'")
+        scraper = SpecScraper(spec)
+        self._by_key[spec.key] = scraper
+        for domain in spec.domains:
+            if domain in self._by_domain:
+                raise SpecError(f"Domain '{domain}' is claimed by two scraper specs")
+            self._by_domain[domain] = scraper
+        return scraper
+
+    def get(self, source: str) -> Optional[SpecScraper]:
+        """Looks a scraper up by source name as stored in the database, e.g. "Paris"."""
+        return self._by_key.get(source.lower().replace(" ", ""))
+
+    def for_url(self, url: str) -> Optional[SpecScraper]:
+        host = (urlparse(url).hostname or "").lower()
+        while host:
+            scraper = self._by_domain.get(host)
+            if scraper is not None:
+                return scraper
+            _, _, host = host.partition(".")
+        return None
+
+    def sources(self) -> List[str]:
+        """Display names of every registered source, as stored in the database."""
+        return [scraper.source_name for scraper in self._by_key.values()]
+
+    def __iter__(self):
+        return iter(self._by_key.values())
+
+
+registry = ScraperRegistry()
+
+
+def get_scraper(source: str) -> SpecScraper:
+    scraper = registry.get(source)
+    if scraper is None:
+        raise KeyError(f"No scraper spec for source '{source}'")
+    return scraper
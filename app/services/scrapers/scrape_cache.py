@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from app.config import SCRAPE_CACHE_TTL_SECONDS
+from app.services.scrapers.base_scraper import ProductInfo
+from app.services.logger import get_logger
+from app.utils.url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+MAX_ENTRIES = 5000
+
+
+class ClaimReleased(Exception):
+    """The claimed scrape ended without a result; waiters scrape the URL themselves."""
+
+
+def _consume(future: asyncio.Future) -> None:
+    # Nobody may be waiting on a failed scrape; retrieve the error so asyncio does not warn.
+    if not future.cancelled():
+        future.exception()
+
+
+class ScrapeCache:
+    """
+    Scrape results keyed by normalized URL, so spellings of one product
+    page share an entry. Concurrent requests for a URL share one
+    in-flight scrape, and finished ProductInfo results are reused for `ttl`
+    seconds. The watcher pipeline claims URLs it is scraping and resolves them
+    after parsing, so /compare can wait on a watcher scrape and vice versa.
+    """
+
+    def __init__(self, ttl: float = SCRAPE_CACHE_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._results: Dict[str, Tuple[ProductInfo, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def lookup(self, url: str) -> Optional[ProductInfo]:
+        """Returns a fresh cached result, or None."""
+        key = normalize_url(url)
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        info, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._results[key]
+            return None
+        self.hits += 1
+        return info
+
+    def in_flight(self, url: str) -> Optional[asyncio.Future]:
+        future = self._inflight.get(normalize_url(url))
+        if future is not None:
+            self.coalesced += 1
+        return future
+
+    def put(self, url: str, info: ProductInfo) -> None:
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._results) >= MAX_ENTRIES:
+            self._results = {u: e for u, e in self._results.items() if e[1] > now}
+        self._results[normalize_url(url)] = (info, now + self.ttl)
+
+    def invalidate(self, url: str) -> None:
+        self._results.pop(normalize_url(url), None)
+
+    def claim(self, url: str) -> asyncio.Future:
+        """Registers a scrape the caller runs itself; settle it with resolve()."""
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume)
+        self._inflight[normalize_url(url)] = future
+        return future
+
+    def resolve(self, url: str, future: asyncio.Future, info: Optional[ProductInfo] = None,
+                error: Optional[BaseException] = None) -> None:
+        key = normalize_url(url)
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            self.put(url, info)
+            future.set_result(info)
+
+    def release(self, url: str, future: asyncio.Future) -> None:
+        """Gives up a claim without a result, e.g. when parsing was skipped."""
+        self.resolve(url, future, error=ClaimReleased(url))
+
+    def _finish(self, url: str, task: asyncio.Task) -> None:
+        key = normalize_url(url)
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(url, task.result())
+
+    async def get_product_info(self, scraper, url: str, force: bool = False) -> ProductInfo:
+        """
+        Returns a cached result younger than the TTL, joins a scrape already in
+        flight for the URL, or starts one. `force` skips the cached result but
+        still joins an in-flight scrape, which is fresh by definition.
+        """
+        if not force:
+            info = self.lookup(url)
+            if info is not None:
+                return info
+
+        pending = self.in_flight(url)
+        if pending is not None:
+            try:
+                # Shielded so one caller giving up does not cancel the shared scrape.
+                return await asyncio.shield(pending)
+            except ClaimReleased:
+                pending = self._inflight.get(normalize_url(url))
+
+        if pending is None:
+            self.misses += 1
+            pending = asyncio.create_task(scraper.get_product_info(url))
+            pending.add_done_callback(lambda task: self._finish(url, task))
+            self._inflight[normalize_url(url)] = pending
+        return await asyncio.shield(pending)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._results), "in_flight": len(self._inflight),
+                "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+
+scrape_cache = ScrapeCache()
@@ -0,0 +1,368 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.config import PRICE_FIELDS
+from app.services.scrapers.base_scraper import (
+    BaseScraper, ProductInfo, PageRetrievalError, FETCH_TIER_HTTP, FETCH_TIER_BROWSER,
+    looks_like_bot_wall)
+from app.services.scrapers.extraction import css, find_element, iter_regions, parse_html, text_of, xpath
+from app.services.scrapers.navigation import NavigationProfile
+from app.utils.json_parser import decode_at, find_embedded_json
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+FETCH_TIERS = (FETCH_TIER_HTTP, FETCH_TIER_BROWSER)
+ACCEPT_MODES = ("payload", "any_price", "all_prices")
+LABEL_FIELDS = ("name", *PRICE_FIELDS, "timestamp")
+
+
+class SpecError(ValueError):
+    pass
+
+
+def resolve(data, path: str):
+    """
+    Follows a dotted path such as "props.pageProps.product.0.name" through
+    nested dicts and lists, returning None when a step is missing. "*" takes
+    the first list item where the rest of the path resolves, and a numeric
+    step on a lone object treats it as a one-item list (JSON-LD "offers").
+    """
+    keys = path.split(".")
+    for i, key in enumerate(keys):
+        if key == "*":
+            if not isinstance(data, list):
+                return None
+            rest = ".".join(keys[i + 1:])
+            return next((v for v in (resolve(item, rest) if rest else item for item in data)
+                         if v is not None), None)
+        if isinstance(data, dict) and key.isdigit() and key not in data:
+            data = [data]
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def _first_value(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _as_list(value) -> List[str]:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+class JsonExtractor:
+    """One embedded-JSON extraction path of a spec, e.g. window.productJSON or JSON-LD."""
+
+    def __init__(self, spec: dict) -> None:
+        self.name = spec.get("name", "json")
+        self.payloads = _as_list(spec.get("payloads"))
+        if not self.payloads:
+            raise SpecError(f"JSON extractor '{self.name}' lists no payloads")
+        for kind in self.payloads:
+            if kind not in ("document", "next_data") and not kind.startswith(("window:", "ld_json:")):
+                raise SpecError(f"Unknown payload kind '{kind}'")
+        self.product_paths = _as_list(spec.get("product"))
+        self.name_path = spec.get("name_path", "name")
+        price_list = spec.get("price_list")
+        if price_list is not None:
+            self.price_list_paths = _as_list(price_list.get("paths", "prices"))
+            self.price_list_key = price_list["key"]
+            self.price_list_value = price_list.get("value", "price")
+        else:
+            self.price_list_paths = None
+        self.prices = {field: _as_list(spec.get("prices", {}).get(field)) for field in PRICE_FIELDS}
+        self.accept = spec.get("accept", "payload")
+        if self.accept not in ACCEPT_MODES:
+            raise SpecError(f"Unknown accept mode '{self.accept}'")
+        self.as_text = bool(spec.get("as_text", False))
+
+    def _product(self, payload):
+        if not self.product_paths:
+            return payload if isinstance(payload, dict) else None
+        return next((p for p in (resolve(payload, path) for path in self.product_paths)
+                     if isinstance(p, dict)), None)
+
+    def _price_map(self, product: dict) -> Optional[dict]:
+        entries = next((e for e in (resolve(product, path) for path in self.price_list_paths)
+                        if isinstance(e, list) and e), None)
+        if entries is None:
+            return None
+        by_key = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            value = _first_value(entry.get(self.price_list_value))
+            if value is not None:
+                by_key[entry.get(self.price_list_key)] = value
+        return by_key
+
+    def extract(self, payloads: dict) -> Optional[ProductInfo]:
+        for kind in self.payloads:
+            product = self._product(payloads.get(kind))
+            if product is None:
+                continue
+
+            if self.price_list_paths is not None:
+                source = self._price_map(product)
+                if source is None:
+                    continue
+                lookup = source.get
+            else:
+                lookup = lambda path, product=product: resolve(product, path)
+
+            prices = {}
+            for field, keys in self.prices.items():
+                value = next((v for v in (_first_value(lookup(k)) for k in keys)
+                              if v is not None), None)
+                if self.as_text and value is not None:
+                    value = str(value)
+                prices[field] = value
+
+            if self.accept == "all_prices" and None in prices.values():
+                continue
+            if self.accept == "any_price" and all(v is None for v in prices.values()):
+                continue
+            return ProductInfo(resolve(product, self.name_path), prices["price1"],
+                               prices["price2"], prices["price3"], extracted_from=self.name)
+        return None
+
+
+class DomField:
+    """Selectors for one field, evaluated inside an optional pre-sliced region."""
+
+    def __init__(self, spec: dict) -> None:
+        region = spec.get("region")
+        self.region: Optional[Tuple[str, str, bool]] = (
+            (region["tag"], region["class"], bool(region.get("exact", False))) if region else None)
+        self.selectors = ([css(s) for s in _as_list(spec.get("css"))] +
+                          [xpath(s) for s in _as_list(spec.get("xpath"))])
+        if self.region is None and not self.selectors:
+            raise SpecError("DOM field needs a region, a css or an xpath selector")
+        self.contains = spec.get("contains")
+
+    def extract(self, root) -> Optional[str]:
+        if root is None:
+            return None
+        if not self.selectors:
+            return text_of(root)
+        for selector in self.selectors:
+            matches = selector(root)
+            if not matches:
+                continue
+            first = matches[0]
+            value = str(first) if isinstance(first, str) else text_of(first)
+            if self.contains and self.contains not in value:
+                return None
+            if value:
+                return value
+        return None
+
+
+class FingerprintPart:
+    """
+    Part of the page that holds the prices. Either a decoded payload (as the
+    JSON extractors name them) read at the first of `paths` that resolves,
+    which is the same data the parser reads; or a raw slice located with
+    string search: the JSON value after `json_after` or the `<tag class=...>`
+    element, both looked up after `anchor` when given.
+    """
+
+    def __init__(self, spec: dict) -> None:
+        self.payload = spec.get("payload")
+        self.paths = _as_list(spec.get("paths"))
+        self.anchor = spec.get("anchor")
+        self.json_after = spec.get("json_after")
+        region = spec.get("region")
+        self.region = (region["tag"], region["class"]) if region else None
+        if sum(x is not None for x in (self.payload, self.json_after, self.region)) != 1:
+            raise SpecError("Fingerprint part needs exactly one of payload, json_after or region")
+        if self.payload is not None and not self.paths:
+            raise SpecError("Payload fingerprint part lists no paths")
+
+    def extract_payload(self, payloads: dict) -> Optional[str]:
+        """Canonical JSON of the value at the first path that resolves to something non-empty."""
+        data = payloads.get(self.payload)
+        value = next((v for v in (resolve(data, path) for path in self.paths) if v), None)
+        if value is None:
+            return None
+        return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+    def extract(self, html: str) -> Optional[str]:
+        start = 0
+        if self.anchor:
+            start = html.find(self.anchor)
+            if start == -1:
+                return None
+
+        if self.json_after is not None:
+            idx = html.find(self.json_after, start)
+            if idx == -1:
+                return None
+            value_start = idx + len(self.json_after)
+            while value_start < len(html) and html[value_start] in " \t\r\n":
+                value_start += 1
+            _, end = decode_at(html, value_start)
+            return html[value_start:end] if end != -1 else None
+
+        for region_start, region_end in iter_regions(html, *self.region):
+            if region_start >= start:
+                return html[region_start:region_end]
+        return None
+
+
+class SiteSpec:
+    """A retailer spec compiled once: navigation profile, JSON extractors and DOM selectors."""
+
+    def __init__(self, key: str, spec: dict) -> None:
+        try:
+            self.key = key
+            self.source = spec["source"]
+            self.domains = tuple(d.lower() for d in spec["domains"])
+            self.fetch_tier = spec.get("fetch_tier", FETCH_TIER_BROWSER)
+            if self.fetch_tier not in FETCH_TIERS:
+                raise SpecError(f"Unknown fetch tier '{self.fetch_tier}'")
+            self.labels = {field: spec.get("labels", {}).get(field, field) for field in LABEL_FIELDS}
+            self.navigation_profile = NavigationProfile(**spec.get("navigation", {}))
+            self.http_url = spec.get("http_url")
+            self.bot_wall_attempts = int(spec.get("bot_wall_attempts", 0))
+            self.retry_delay = float(spec.get("retry_delay", 0))
+            self.json_extractors = [JsonExtractor(e) for e in spec.get("json", [])]
+            self.dom_fields = {field: DomField(s) for field, s in spec.get("dom", {}).items()
+                               if field in ("name", *PRICE_FIELDS)}
+            self.fingerprint_parts = [FingerprintPart(p) for p in spec.get("fingerprint", [])]
+        except (KeyError, TypeError) as e:
+            raise SpecError(f"Invalid scraper spec '{key}': {e!r}") from e
+
+        kinds = {kind for e in self.json_extractors for kind in e.payloads}
+        self.wants_document = "document" in kinds
+        self.window_names = tuple(k.split(":", 1)[1] for k in kinds if k.startswith("window:"))
+        self.ld_json_types = tuple(k.split(":", 1)[1] for k in kinds if k.startswith("ld_json:"))
+        self.wants_next_data = "next_data" in kinds
+        for part in self.fingerprint_parts:
+            if part.payload is not None and part.payload not in kinds:
+                raise SpecError(f"Fingerprint payload '{part.payload}' of '{key}' is not read by any JSON extractor")
+
+    def http_url_for(self, url: str) -> str:
+        if not self.http_url:
+            return url
+        parsed = urlparse(url)
+        return self.http_url.format(scheme=parsed.scheme, netloc=parsed.netloc,
+                                    path=parsed.path.strip("/") or "index")
+
+    def payloads(self, html: str) -> Dict[str, object]:
+        """Decodes every embedded JSON payload the extractors read, in one pass."""
+        if self.wants_document:
+            stripped = html.lstrip()
+            if stripped.startswith("{"):
+                value, _ = decode_at(html, len(html) - len(stripped))
+                return {"document": value}
+        if not (self.window_names or self.wants_next_data or self.ld_json_types):
+            return {}
+
+        embedded = find_embedded_json(html, window_names=self.window_names,
+                                      next_data=self.wants_next_data,
+                                      ld_json=bool(self.ld_json_types))
+        payloads = {"next_data": embedded.next_data}
+        for name in self.window_names:
+            payloads[f"window:{name}"] = embedded.window.get(name)
+        for type_name in self.ld_json_types:
+            payloads[f"ld_json:{type_name}"] = embedded.ld_json_of_type(type_name)
+        return payloads
+
+    def fingerprint(self, html: str) -> Optional[str]:
+        """
+        Hash of the first fingerprint part found in the page, or None when the
+        spec has none or none is present. Equal hashes mean equal prices.
+        """
+        payloads = None
+        for index, part in enumerate(self.fingerprint_parts):
+            if part.payload is not None:
+                if payloads is None:
+                    payloads = self.payloads(html)
+                raw = part.extract_payload(payloads)
+            else:
+                raw = part.extract(html)
+            if raw is not None:
+                return hashlib.blake2b(f"{index}:{raw}".encode(), digest_size=16).hexdigest()
+        return None
+
+    def parse_dom(self, html: str) -> ProductInfo:
+        regions = {}
+        document = None
+        values = {}
+        for field, dom_field in self.dom_fields.items():
+            if dom_field.region is not None:
+                if dom_field.region not in regions:
+                    regions[dom_field.region] = find_element(html, *dom_field.region)
+                root = regions[dom_field.region]
+            else:
+                if document is None:
+                    document = parse_html(html)
+                root = document
+            values[field] = dom_field.extract(root)
+        return ProductInfo(values.get("name"), values.get("price1"), values.get("price2"),
+                           values.get("price3"), extracted_from="dom")
+
+    def parse(self, html: str) -> ProductInfo:
+        if self.json_extractors:
+            payloads = self.payloads(html)
+            for extractor in self.json_extractors:
+                result = extractor.extract(payloads)
+                if result:
+                    return result
+        return self.parse_dom(html)
+
+
+class SpecScraper(BaseScraper):
+    """Scraper driven entirely by a compiled SiteSpec."""
+
+    def __init__(self, spec: SiteSpec) -> None:
+        self.spec = spec
+        self.source = spec.key
+        self.source_name = spec.source
+        self.fetch_tier = spec.fetch_tier
+        self.navigation_profile = spec.navigation_profile
+        self.labels = spec.labels
+
+    def __reduce__(self):
+        # Parse workers rebuild the scraper from their own registry instead of
+        # receiving the compiled selectors, which do not pickle.
+        from app.services.scrapers.registry import get_scraper
+        return get_scraper, (self.source,)
+
+    async def get_http_source(self, url: str) -> str:
+        return await super().get_http_source(self.spec.http_url_for(url))
+
+    async def get_page_source(self, url: str) -> str:
+        attempts = self.spec.bot_wall_attempts
+        if not attempts:
+            return await super().get_page_source(url)
+        for i in range(attempts):
+            html = await super().get_page_source(url)
+            if not looks_like_bot_wall(html):
+                return html
+            logger.debug("%s captcha detected, retry %d/%d", self.source_name, i + 1, attempts)
+            await asyncio.sleep(self.spec.retry_delay)
+        raise PageRetrievalError(f"Failed to fetch {self.source_name} page: {url}")
+
+    def parse(self, html: str) -> ProductInfo:
+        return self.spec.parse(html)
+
+    def fingerprint(self, html: str) -> Optional[str]:
+        return self.spec.fingerprint(html)
+
+    def __repr__(self) -> str:
+        return f"SpecScraper({self.source!r})"
@@ -0,0 +1,356 @@
+import asyncio
+import datetime
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Optional
+from app.config import (
+    CHANGE_DETECTION_MAX_SKIPS, CHANGE_DETECTION_MAX_SKIP_HOURS, WATCHER_WORKERS, service_name)
+from app.services.database import store_product_info
+from app.services.logger import get_logger
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.price_change import PriceChange
+from app.services.scrapers.base_scraper import FETCH_TIER_HTTP, FETCH_TIER_BROWSER, ProductInfo
+from app.services.scrapers.fetch_stats import fetch_stats, HTTP_HIT, HTTP_FALLBACK, BROWSER_FETCH
+from app.services.scrapers.scrape_cache import scrape_cache
+from app.utils.price_comparer import get_previous_product_info
+
+logger = get_logger(service_name)
+
+STAGES = ("fetch", "detect", "parse", "compare", "store", "notify")
+
+
+class WatchJob:
+    """A single tracked URL moving through the watcher pipeline."""
+
+    def __init__(self, source: str, url: str, scraper, labels: dict, tracking: Optional[dict] = None) -> None:
+        self.source = source
+        self.url = url
+        # The URL's tracking document, used to schedule its next scrape.
+        self.tracking = tracking
+        self.scraper = scraper
+        self.labels = labels
+        self.tier = scraper.fetch_tier
+        self.html: Optional[str] = None
+        self.info: Optional[ProductInfo] = None
+        self.change: Optional[PriceChange] = None
+        # Outcome recorded on the tracking document after the cycle.
+        self.failed_stage: Optional[str] = None
+        self.changed = False
+        # Set while this job owns the URL's in-flight entry in the scrape cache.
+        self.claim: Optional[asyncio.Future] = None
+        self.reused = False
+        # Digest of the page's price regions; a match with the stored one skips parsing.
+        self.fingerprint: Optional[str] = None
+        self.unchanged = False
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """Fingerprint to store, only once a parse of this content found prices."""
+        if self.unchanged:
+            return self.fingerprint
+        if self.fingerprint and self.info is not None and self.info.has_prices():
+            return self.fingerprint
+        return None
+
+    @property
+    def hash_skips(self) -> int:
+        """Consecutive scrapes skipped on an unchanged fingerprint, including this one."""
+        if not self.unchanged:
+            return 0
+        return (self.tracking or {}).get("hash_skips", 0) + 1
+
+    @property
+    def scraped(self) -> bool:
+        """True when the page was fetched and parsed, whatever happened after."""
+        return self.failed_stage not in ("fetch", "parse")
+
+    def escalate(self) -> None:
+        """Moves the job from the HTTP fast path to the browser tier."""
+        self.tier = FETCH_TIER_BROWSER
+        fetch_stats.record(self.scraper.source, HTTP_FALLBACK)
+
+
+class CycleStats:
+    """Wall time, throughput and per-stage counters for one watcher cycle."""
+
+    # Parse time and count across cycles, for estimating the cost of skipped parses.
+    parse_seconds_total = 0.0
+    parses_total = 0
+
+    def __init__(self, urls: int) -> None:
+        self.urls = urls
+        self.started = time.monotonic()
+        self.wall_time = 0.0
+        self.processed = Counter()
+        self.failures = Counter()
+        self.notified = 0
+        self.reused = 0
+        self.unchanged = 0
+        self.parse_time = 0.0
+
+    def finish(self) -> None:
+        self.wall_time = time.monotonic() - self.started
+
+    def record_parse(self, seconds: float) -> None:
+        self.parse_time += seconds
+        CycleStats.parse_seconds_total += seconds
+        CycleStats.parses_total += 1
+
+    @property
+    def parse_time_saved(self) -> float:
+        """Parse time the unchanged pages would have cost at the running average."""
+        if not CycleStats.parses_total:
+            return 0.0
+        return CycleStats.parse_seconds_total / CycleStats.parses_total * self.unchanged
+
+    @property
+    def urls_per_minute(self) -> float:
+        if not self.wall_time:
+            return 0.0
+        return self.urls / self.wall_time * 60
+
+    def as_dict(self) -> dict:
+        return {
+            "urls": self.urls,
+            "wall_time_s": round(self.wall_time, 1),
+            "urls_per_min": round(self.urls_per_minute, 1),
+            "processed": dict(self.processed),
+            "failures": dict(self.failures),
+            "notified": self.notified,
+            "reused": self.reused,
+            "unchanged": self.unchanged,
+            "parse_time_saved_s": round(self.parse_time_saved, 1)
+        }
+
+
+class WatchPipeline:
+    """
+    Bounded-concurrency fetch → detect → parse → compare → store → notify
+    pipeline. Each stage has its own worker pool and the stages are connected
+    by bounded queues, so slow stages apply backpressure to earlier ones.
+    `on_done(job)` is awaited as each job leaves the pipeline, for checkpointing.
+    `more()` is awaited whenever the fetch queue runs dry and returns further
+    jobs, or an empty list once there are none. `notify(job)` replaces sending
+    the change embed to the channel.
+    """
+
+    def __init__(self, channel, workers: Optional[dict] = None,
+                 max_skips: int = CHANGE_DETECTION_MAX_SKIPS,
+                 max_skip_age: datetime.timedelta = datetime.timedelta(hours=CHANGE_DETECTION_MAX_SKIP_HOURS),
+                 on_done: Optional[Callable[["WatchJob"], Awaitable]] = None,
+                 more: Optional[Callable[[], Awaitable[list]]] = None,
+                 notify: Optional[Callable[["WatchJob"], Awaitable]] = None) -> None:
+        self.channel = channel
+        self.workers = {**WATCHER_WORKERS, **(workers or {})}
+        self.max_skips = max_skips
+        self.max_skip_age = max_skip_age
+        self.on_done = on_done
+        self.more = more
+        self.notify = notify
+        self.handlers = {
+            "fetch": self._fetch,
+            "detect": self._detect,
+            "parse": self._parse,
+            "compare": self._compare,
+            "store": self._store,
+            "notify": self._notify
+        }
+
+    async def run(self, jobs: list) -> CycleStats:
+        self.stats = CycleStats(len(jobs))
+        # The fetch queue is unbounded: it is seeded with every job up front and
+        # the parse stage hands HTTP misses back to it for a browser fetch.
+        self.queues = {stage: asyncio.Queue(
+            maxsize=0 if stage == "fetch" else max(1, self.workers[stage]) * 2) for stage in STAGES}
+        self._pending = len(jobs)
+        self._done = asyncio.Event()
+        self._hungry = asyncio.Event()
+        self._feeding = self.more is not None
+        jobs = list(jobs)
+        if not jobs:
+            if self._feeding:
+                self._hungry.set()
+            else:
+                self._done.set()
+
+        for job in jobs:
+            self.queues["fetch"].put_nowait(job)
+
+        tasks = [
+            asyncio.create_task(self._worker(stage))
+            for stage in STAGES
+            for _ in range(max(1, self.workers[stage]))
+        ]
+        if self._feeding:
+            tasks.append(asyncio.create_task(self._feed(jobs)))
+        try:
+            await self._done.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # A cancelled cycle must not leave waiters on its unfinished scrapes.
+            for job in jobs:
+                if job.claim is not None:
+                    scrape_cache.release(job.url, job.claim)
+                    job.claim = None
+
+        self.stats.finish()
+        return self.stats
+
+    async def _complete(self, job: WatchJob) -> None:
+        if job.claim is not None:
+            scrape_cache.resolve(job.url, job.claim, error=RuntimeError(
+                f"Watcher scrape failed in the {job.failed_stage} stage"))
+            job.claim = None
+        if self.on_done is not None:
+            try:
+                await self.on_done(job)
+            except Exception as e:
+                logger.error("Error checkpointing URL %s: %s", job.url, e)
+        self._pending -= 1
+        if self._pending <= 0 and not self._feeding:
+            self._done.set()
+
+    async def _feed(self, jobs: list) -> None:
+        """Adds the jobs returned by more() each time the fetch queue runs dry."""
+        try:
+            while True:
+                await self._hungry.wait()
+                self._hungry.clear()
+                batch = await self.more()
+                if not batch:
+                    break
+                jobs.extend(batch)
+                self.stats.urls += len(batch)
+                self._pending += len(batch)
+                for job in batch:
+                    self.queues["fetch"].put_nowait(job)
+        except Exception as e:
+            logger.error("Error fetching more watcher jobs: %s", e)
+        finally:
+            self._feeding = False
+            if self._pending <= 0:
+                self._done.set()
+
+    async def _worker(self, stage: str) -> None:
+        queue = self.queues[stage]
+        handler = self.handlers[stage]
+        while True:
+            job = await queue.get()
+            if stage == "fetch" and queue.empty():
+                self._hungry.set()
+            try:
+                next_stage = await handler(job)
+                self.stats.processed[stage] += 1
+            except Exception as e:
+                logger.error("Error in %s stage for URL %s: %s", stage, job.url, e)
+                self.stats.failures[stage] += 1
+                job.failed_stage = stage
+                next_stage = None
+
+            if next_stage is None:
+                await self._complete(job)
+            else:
+                await self.queues[next_stage].put(job)
+
+    async def _fetch(self, job: WatchJob) -> str:
+        if job.claim is None:
+            # A recent or in-flight scrape of the URL (e.g. from /compare) is reused.
+            info = scrape_cache.lookup(job.url)
+            if info is None:
+                pending = scrape_cache.in_flight(job.url)
+                if pending is not None:
+                    try:
+                        info = await asyncio.shield(pending)
+                    except Exception as e:
+                        # Not the watcher's failure to back off on: fetch the URL itself.
+                        logger.debug("Shared scrape of %s failed, fetching it again: %s", job.url, e)
+            if info is not None:
+                job.info = info
+                job.reused = True
+                self.stats.reused += 1
+                return "compare"
+            job.claim = scrape_cache.claim(job.url)
+
+        if job.tier == FETCH_TIER_HTTP:
+            try:
+                job.html = await job.scraper.get_http_source(job.url)
+                return "detect"
+            except Exception as e:
+                logger.debug("HTTP tier failed for %s: %s", job.url, e)
+                job.escalate()
+
+        job.html = await job.scraper.get_page_source(job.url)
+        fetch_stats.record(job.scraper.source, BROWSER_FETCH)
+        return "detect"
+
+    async def _detect(self, job: WatchJob) -> Optional[str]:
+        """
+        Fingerprints the page's price regions. When the digest matches the one
+        stored after the last successful parse, the prices cannot have changed
+        and the job ends here. After max_skips skips in a row, or max_skip_age
+        since the parse that stored the digest, the page is parsed anyway, so a
+        stale fingerprint cannot hide a change for long.
+        """
+        if self.max_skips <= 0:
+            return "parse"
+        job.fingerprint = job.scraper.fingerprint(job.html)
+        tracking = job.tracking or {}
+        if (job.fingerprint is None or job.fingerprint != tracking.get("content_hash")
+                or tracking.get("hash_skips", 0) >= self.max_skips
+                or self._hash_expired(tracking.get("hashed_at"))):
+            return "parse"
+
+        job.html = None
+        job.unchanged = True
+        self.stats.unchanged += 1
+        if job.tier == FETCH_TIER_HTTP:
+            fetch_stats.record(job.scraper.source, HTTP_HIT)
+        # Anyone waiting on this scrape (e.g. /compare) runs a full one instead.
+        scrape_cache.release(job.url, job.claim)
+        job.claim = None
+        return None
+
+    def _hash_expired(self, hashed_at: Optional[datetime.datetime]) -> bool:
+        if hashed_at is None:
+            return True
+        if hashed_at.tzinfo is None:
+            hashed_at = hashed_at.replace(tzinfo=datetime.timezone.utc)
+        return datetime.datetime.now(datetime.timezone.utc) - hashed_at >= self.max_skip_age
+
+    async def _parse(self, job: WatchJob) -> str:
+        html, job.html = job.html, None
+        started = time.perf_counter()
+        job.info = await job.scraper.run_parse(job.url, html)
+        self.stats.record_parse(time.perf_counter() - started)
+        if job.tier == FETCH_TIER_HTTP:
+            if not job.info.has_prices():
+                logger.debug("HTTP tier returned no prices for %s", job.url)
+                job.escalate()
+                return "fetch"
+            fetch_stats.record(job.scraper.source, HTTP_HIT)
+        scrape_cache.resolve(job.url, job.claim, info=job.info)
+        job.claim = None
+        return "compare"
+
+    async def _compare(self, job: WatchJob) -> Optional[str]:
+        last_info = await get_previous_product_info(job.url)
+        if last_info is None:
+            return "store"
+
+        job.change = PriceChange.detect(job.source, job.url, job.info, last_info, job.labels)
+        return "store" if job.change else None
+
+    async def _store(self, job: WatchJob) -> Optional[str]:
+        job.changed = await store_product_info(job.source, job.url, job.info, job.labels)
+        return "notify" if job.change else None
+
+    async def _notify(self, job: WatchJob) -> None:
+        if self.notify is not None:
+            await self.notify(job)
+        else:
+            # Queued, not sent: the dispatcher batches and rate-limits Discord I/O.
+            notification_dispatcher.submit(self.channel, job.change, key=job.url)
+        self.stats.notified += 1
+        return None
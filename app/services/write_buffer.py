@@ -0,0 +1,92 @@
+import time
+from typing import Callable, List, Optional
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WriteBuffer:
+    """
+    Collects documents and writes them with one unordered insert_many when
+    `max_docs` are pending or the oldest one has waited `max_delay` seconds.
+    Callers flush explicitly at the end of a watcher cycle and on shutdown.
+    `on_error(document, message)` is called for every document the server
+    rejected. When the write fails as a whole (e.g. the connection dropped)
+    the batch stays pending for the next flush and flush() re-raises, so
+    callers do not treat the records as stored.
+    `get_collection` returns the async collection, which is created lazily.
+    """
+
+    def __init__(
+        self,
+        get_collection: Callable,
+        max_docs: int = 100,
+        max_delay: float = 5.0,
+        on_error: Optional[Callable[[dict, str], None]] = None
+    ) -> None:
+        self.get_collection = get_collection
+        self.max_docs = max(1, max_docs)
+        self.max_delay = max_delay
+        self.on_error = on_error
+        self._pending: List[dict] = []
+        self._oldest: Optional[float] = None
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(self, document: dict) -> None:
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append(document)
+        if len(self._pending) >= self.max_docs or self._expired():
+            try:
+                await self.flush()
+            except PyMongoError as e:
+                # Kept pending; the caller's explicit flush retries and reports it.
+                logger.error("Failed to flush %d buffered documents: %s", len(self._pending), e)
+
+    def _expired(self) -> bool:
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_delay
+
+    def _fail(self, document: dict, message: str) -> None:
+        self.failed += 1
+        logger.error("Failed to insert document for URL: %s. Error: %s", document.get("url"), message)
+        if self.on_error is not None:
+            self.on_error(document, message)
+
+    async def flush(self) -> int:
+        """
+        Writes every pending document. Returns how many were inserted; raises
+        PyMongoError, keeping the documents pending, if none could be written.
+        """
+        if not self._pending:
+            return 0
+        batch, oldest = self._pending, self._oldest
+        self._pending, self._oldest = [], None
+        self.flushes += 1
+
+        try:
+            result = await self.get_collection().insert_many(batch, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            for error in errors:
+                self._fail(batch[error["index"]], error.get("errmsg", "write error"))
+            inserted = e.details.get("nInserted", len(batch) - len(errors))
+        except PyMongoError:
+            # Documents added while the write was in flight stay behind the failed batch.
+            self._pending[:0] = batch
+            self._oldest = oldest
+            raise
+
+        self.written += inserted
+        logger.info("Flushed %d price records (%d failed).", inserted, len(batch) - inserted)
+        return inserted
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "written": self.written,
+                "failed": self.failed, "flushes": self.flushes}
@@ -1,52 +1,103 @@
 import json
-from typing import Optional
+import re
+from typing import Iterable, List, Optional
 from app.services.logger import get_logger
 from app.config import service_name
 
 logger = get_logger(service_name)
 
+_DECODER = json.JSONDecoder()
 
-def find_end_of_json(s: str, start_idx: int) -> int:
-    """
-    Finds the index where the JSON object ends.
-    """
-    brace_count = 0
-    in_string = False
-    escape = False
-    for i, char in enumerate(s[start_idx:], start=start_idx):
-        if char == '"' and not escape:
-            in_string = not in_string
-        if not in_string:
-            if char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    return i + 1
-        escape = (char == '\\' and not escape)
-    return -1
-
-
-def extract_product_json(html: str) -> Optional[dict]:
+# Candidates are located with str.find on literal anchors and only then
+# matched with an anchored pattern, so the document is scanned in C.
+WINDOW_ANCHOR = "window."
+SCRIPT_ANCHOR = "<script"
+WINDOW_ASSIGNMENT = re.compile(r"window\.([A-Za-z_$][\w$]*)\s*=\s*")
+SCRIPT_TAG = re.compile(r"<script\b([^>]*)>\s*")
+
+
+class EmbeddedJson:
+    """JSON payloads found in a page: window.X assignments, __NEXT_DATA__ and JSON-LD."""
+
+    def __init__(self) -> None:
+        self.window = {}
+        self.next_data: Optional[dict] = None
+        self.ld_json: List[dict] = []
+
+    def ld_json_of_type(self, type_name: str) -> Optional[dict]:
+        """Returns the first JSON-LD object with the given @type."""
+        for data in self.ld_json:
+            if isinstance(data, dict) and data.get("@type") == type_name:
+                return data
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self.window or self.next_data or self.ld_json)
+
+
+def decode_at(s: str, idx: int):
     """
-    Extracts the JSON object assigned to window.productJSON from the HTML.
+    Decodes the JSON value starting at s[idx] with the C scanner, without
+    copying the rest of the string. Returns (value, end_idx) or (None, -1).
     """
-    marker = "window.productJSON ="
-    idx = html.find(marker)
-    if idx == -1:
-        logger.debug("'window.productJSON' not found in HTML.")
-        return None
-    start_idx = html.find("{", idx)
-    if start_idx == -1:
-        logger.debug("JSON start not found.")
-        return None
-    end_idx = find_end_of_json(html, start_idx)
-    if end_idx == -1:
-        logger.debug("JSON end not found.")
-        return None
-    json_str = html[start_idx:end_idx]
     try:
-        return json.loads(json_str)
+        return _DECODER.raw_decode(s, idx)
     except json.JSONDecodeError as e:
-        logger.debug("Error decoding JSON: %s", e)
-        return None
+        logger.debug("Error decoding JSON at %d: %s", idx, e)
+        return None, -1
+
+
+def find_embedded_json(
+    html: str,
+    window_names: Optional[Iterable[str]] = None,
+    next_data: bool = True,
+    ld_json: bool = True
+) -> EmbeddedJson:
+    """
+    Finds every requested embedded JSON payload in a single pass over the HTML.
+    `window_names` limits which `window.X =` assignments are decoded; None
+    decodes all of them.
+    """
+    wanted = set(window_names) if window_names is not None else None
+    result = EmbeddedJson()
+    scan_scripts = next_data or ld_json
+    next_window = html.find(WINDOW_ANCHOR) if wanted != set() else -1
+    next_script = html.find(SCRIPT_ANCHOR) if scan_scripts else -1
+    pos = 0
+
+    while next_window != -1 or next_script != -1:
+        if next_script == -1 or (next_window != -1 and next_window < next_script):
+            match = WINDOW_ASSIGNMENT.match(html, next_window)
+            pos = next_window + len(WINDOW_ANCHOR)
+            if match is not None:
+                name = match.group(1)
+                if (wanted is None or name in wanted) and name not in result.window:
+                    value, end = decode_at(html, match.end())
+                    if end != -1:
+                        result.window[name] = value
+                        pos = end
+        else:
+            match = SCRIPT_TAG.match(html, next_script)
+            pos = next_script + len(SCRIPT_ANCHOR)
+            if match is not None:
+                attrs = match.group(1)
+                is_next_data = next_data and "__NEXT_DATA__" in attrs
+                is_ld_json = ld_json and "application/ld+json" in attrs
+                if is_next_data or is_ld_json:
+                    value, end = decode_at(html, match.end())
+                    if end != -1:
+                        pos = end
+                        if is_next_data:
+                            result.next_data = value
+                        elif isinstance(value, list):
+                            result.ld_json.extend(value)
+                        else:
+                            result.ld_json.append(value)
+
+        if next_window != -1 and next_window < pos:
+            next_window = html.find(WINDOW_ANCHOR, pos)
+        if next_script != -1 and next_script < pos:
+            next_script = html.find(SCRIPT_ANCHOR, pos)
+
+    return result
+
@@ -1,29 +1,24 @@
 import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 from dateutil import parser
 import discord
-from pymongo import DESCENDING
-from app.services.database import get_urls_by_source, store_product_info, info_collection
+from app.services.database import get_urls_by_source, store_product_info, latest_prices, flush_price_writes
 from app.services.scrapers.base_scraper import ProductInfo
-from app.services.scrapers.falabella_scraper import FalabellaScraper
-from app.services.scrapers.paris_scraper import ParisScraper
-from app.services.scrapers.spdigital_scraper import SpDigitalScraper
-from app.utils.price_parser import parse_price
-from app.config import PRICE_FIELDS, PARIS_LABELS, FALABELLA_LABELS, SPDIGITAL_LABELS, service_name, SOURCES
+from app.services.scrapers.registry import registry
+from app.services.scrapers.scrape_cache import scrape_cache
+from app.utils.price_parser import parse_price, format_price
+from app.config import PRICE_FIELDS, service_name
 from app.services.logger import get_logger
 
 logger = get_logger(service_name)
 
 
-def format_price(value: int) -> str:
-    return f"${value:,.0f}".replace(",", ".") if value else "Not available"
+async def get_previous_product_info(url: str):
+    return await latest_prices.get(url)
 
 
-def get_previous_product_info(url: str):
-    return info_collection.find_one({"url": url}, sort=[("timestamp", DESCENDING)])
-
-
-def compare_product_prices(url: str, new_info: ProductInfo, label_mapping: dict) -> None:
-    stored = get_previous_product_info(url)
+async def compare_product_prices(url: str, new_info: ProductInfo, label_mapping: dict) -> None:
+    stored = await get_previous_product_info(url)
     if not stored:
         logger.debug(
             "No previous record found for comparison for URL: %s", url)
@@ -46,7 +41,7 @@ def compare_product_prices(url: str, new_info: ProductInfo, label_mapping: dict)
                         url, field_label, new_price)
 
 
-def format_comparison_details(url: str, new_info: ProductInfo, label_mapping: dict) -> str:
+async def format_comparison_details(url: str, new_info: ProductInfo, label_mapping: dict) -> str:
     try:
         ts = parser.parse(new_info.timestamp)
         formatted_ts = ts.strftime("%d/%m/%Y %H:%M:%S")
@@ -62,7 +57,7 @@ def format_comparison_details(url: str, new_info: ProductInfo, label_mapping: di
     info_section += f"**Date:** {formatted_ts}\n\n"
 
     changes = ""
-    stored = get_previous_product_info(url)
+    stored = await get_previous_product_info(url)
     if stored:
         for field in PRICE_FIELDS:
             field_label = label_mapping.get(field, field)
@@ -81,17 +76,17 @@ def format_comparison_details(url: str, new_info: ProductInfo, label_mapping: di
     return info_section + changes
 
 
-async def create_embed_for_url(source: str, url: str, scraper, label_mapping: dict, bot: discord.Client = None) -> discord.Embed:
+async def create_embed_for_url(source: str, url: str, scraper, label_mapping: dict, bot: discord.Client = None, force: bool = False) -> discord.Embed:
     try:
-        info = await scraper.get_product_info(url)
+        info = await scrape_cache.get_product_info(scraper, url, force=force)
     except Exception as e:
         logger.error("Error getting product info for %s: %s", url, e)
         return None
 
-    details = format_comparison_details(url, info, label_mapping)
-    compare_product_prices(url, info, label_mapping)
+    details = await format_comparison_details(url, info, label_mapping)
+    await compare_product_prices(url, info, label_mapping)
 
-    store_product_info(source, url, info, label_mapping)
+    await store_product_info(source, url, info, label_mapping)
 
     if not details:
         return None
@@ -106,23 +101,41 @@ async def create_embed_for_url(source: str, url: str, scraper, label_mapping: di
     return embed
 
 
-async def get_comparison_embeds(bot: discord.Client = None) -> list:
-    tasks = []
-    scraper_mapping = {
-        "paris": (ParisScraper(), PARIS_LABELS),
-        "falabella": (FalabellaScraper(), FALABELLA_LABELS),
-        "spdigital": (SpDigitalScraper(), SPDIGITAL_LABELS)
-    }
-    for source in SOURCES:
-        source_key = source.lower().replace(" ", "")
-        if source_key not in scraper_mapping:
+async def get_comparison_targets(source: Optional[str] = None) -> List[tuple]:
+    """(scraper, url) for every tracked URL, or only those of one source."""
+    scrapers = list(registry) if source is None else [registry.get(source)]
+    targets = []
+    for scraper in scrapers:
+        if scraper is None:
             continue
-
-        scraper, label_mapping = scraper_mapping[source_key]
-        urls = get_urls_by_source(source)
-        for url in urls:
-            tasks.append(create_embed_for_url(
-                source, url, scraper, label_mapping, bot))
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return [embed for embed in results if embed is not None and not isinstance(embed, Exception)]
+        for url in await get_urls_by_source(scraper.source_name):
+            targets.append((scraper, url))
+    return targets
+
+
+async def iter_comparison_embeds(
+    targets: List[tuple], bot: discord.Client = None, force: bool = False
+) -> AsyncIterator[Tuple[str, Optional[discord.Embed]]]:
+    """
+    Yields (url, embed) as each comparison finishes, fastest first; the embed
+    is None when the scrape failed. Browser work is bounded by the browser
+    admission controller, not here.
+    """
+    async def compare_one(scraper, url):
+        try:
+            return url, await create_embed_for_url(
+                scraper.source_name, url, scraper, scraper.labels, bot, force)
+        except Exception as e:
+            logger.error("Error comparing %s: %s", url, e)
+            return url, None
+
+    for future in asyncio.as_completed([compare_one(scraper, url) for scraper, url in targets]):
+        yield await future
+
+
+async def get_comparison_embeds(bot: discord.Client = None, force: bool = False,
+                                source: Optional[str] = None) -> list:
+    targets = await get_comparison_targets(source)
+    embeds = [embed async for _, embed in iter_comparison_embeds(targets, bot, force) if embed is not None]
+    await flush_price_writes()
+    return embeds
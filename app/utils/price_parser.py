@@ -18,3 +18,7 @@ def parse_price(price: Optional[str]) -> Optional[int]:
     except Exception as e:
         logger.error("Error parsing price '%s': %s", price_str, e)
         return None
+
+
+def format_price(value: int) -> str:
+    return f"${value:,.0f}".replace(",", ".") if value else "Not available"
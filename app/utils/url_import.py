@@ -0,0 +1,61 @@
+import csv
+import io
+import re
+from typing import List, Tuple
+from urllib.parse import urlsplit
+from app.services.scrapers.registry import registry
+from app.utils.url_utils import normalize_url
+
+TOKEN_SEPARATORS = re.compile(r"[\s;|]+")
+# A host name, optionally followed by a path: "paris.cl/producto".
+HOST_LIKE = re.compile(r"^[\w-]+(\.[\w-]+)*\.[a-z]{2,}(/|$)", re.IGNORECASE)
+
+
+class ImportPlan:
+    "URLs read from an import file, split into new candidates, duplicates and invalid entries."
+
+    def __init__(self) -> None:
+        self.entries: List[Tuple[str, str]] = []
+        self.duplicates: List[str] = []
+        self.invalid: List[str] = []
+
+
+def extract_urls(text: str) -> List[str]:
+    """
+    URL-looking tokens of a CSV or plain text file, in file order. Cells are
+    split on whitespace, ";" and "|". A leading "www." gets https://, other
+    host names without a scheme are kept as they are so the import reports
+    them as invalid, and the remaining tokens (headers, dates, prices) are
+    ignored, so an /export file reads back.
+    """
+    urls = []
+    for row in csv.reader(io.StringIO(text)):
+        for cell in row:
+            for token in TOKEN_SEPARATORS.split(cell.strip()):
+                token = token.strip("\"'<>()[],")
+                if "://" in token:
+                    urls.append(token)
+                elif token.lower().startswith("www."):
+                    urls.append(f"https://{token}")
+                elif HOST_LIKE.match(token):
+                    urls.append(token)
+    return urls
+
+
+def plan_import(text: str) -> ImportPlan:
+    "Normalizes and dedupes the URLs of an import file and resolves each one's source."
+    plan = ImportPlan()
+    seen = set()
+    for url in extract_urls(text):
+        parsed = urlsplit(url)
+        scraper = registry.for_url(url) if parsed.scheme in ("http", "https") and parsed.hostname else None
+        if scraper is None:
+            plan.invalid.append(url)
+            continue
+        key = normalize_url(url)
+        if key in seen:
+            plan.duplicates.append(url)
+            continue
+        seen.add(key)
+        plan.entries.append((scraper.source_name, url))
+    return plan
@@ -1,11 +1,26 @@
-from urllib.parse import urlparse
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = frozenset(("gclid", "fbclid", "mc_cid", "mc_eid"))
 
-def extract_source(url: str) -> str:
-    "Extracts the source name from the URL."
-    parsed = urlparse(url)
-    domain = parsed.netloc
-    if domain.startswith("www."):
-        domain = domain[4:]
-    source = domain.split('.')[0]
-    return source.capitalize()
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used as the tracking key: https, lowercase host without
+    "www.", no fragment, no trailing slash and sorted query parameters with
+    tracking parameters removed.
+    """
+    parsed = urlsplit(url.strip())
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    scheme = parsed.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parsed.path.rstrip("/") or "/", urlencode(query), ""))
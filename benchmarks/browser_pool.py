@@ -0,0 +1,77 @@
+"""
+Compares pages per minute when launching Chromium for every URL against the
+shared browser pool.
+
+Usage:
+    python -m benchmarks.browser_pool URL [URL ...] [--pages 20] [--size 2]
+"""
+import argparse
+import asyncio
+import time
+from playwright.async_api import async_playwright
+from app.config import HEADERS
+from app.services.scrapers.browser_pool import BrowserPool
+
+
+async def fetch_launch_per_url(url: str) -> str:
+    """The previous fetch strategy: one browser per URL."""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(
+            user_agent=HEADERS["User-Agent"],
+            extra_http_headers=HEADERS
+        )
+        page = await context.new_page()
+        await page.goto(url, timeout=60_000)
+        content = await page.content()
+        await browser.close()
+        return content
+
+
+async def run_launch_per_url(urls: list, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            await fetch_launch_per_url(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in urls))
+    return time.perf_counter() - start
+
+
+async def run_pooled(urls: list, size: int) -> float:
+    pool = BrowserPool(size=size)
+    await pool.start()
+
+    async def fetch(url):
+        async with pool.page() as page:
+            await page.goto(url, timeout=60_000)
+            await page.content()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in urls))
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    return elapsed
+
+
+async def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("urls", nargs="+")
+    arg_parser.add_argument("--pages", type=int, default=20)
+    arg_parser.add_argument("--size", type=int, default=2)
+    args = arg_parser.parse_args()
+
+    urls = [args.urls[i % len(args.urls)] for i in range(args.pages)]
+
+    for label, elapsed in (
+        ("launch-per-url", await run_launch_per_url(urls, args.size)),
+        ("browser-pool", await run_pooled(urls, args.size)),
+    ):
+        print(f"{label:<16} {len(urls)} pages in {elapsed:6.1f}s "
+              f"-> {len(urls) / elapsed * 60:6.1f} pages/min")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Runs the watcher in distributed mode with 1..N replica processes against a
+local mongod and reports throughput, URLs scraped more than once and
+notifications sent more than once. Pages are served by a fake HTTP client
+with a fixed latency, so only the lease coordination is measured.
+
+The benchmark writes to a scratch database, which is dropped afterwards.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python -m benchmarks.distributed_watch \\
+        [--urls 300] [--replicas 1 2 4] [--latency 0.2] [--db scraper_bench]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+PAGE = ('<script>window.productJSON = {"name":"Bench","prices":'
+        '[{"priceBookId":"clp-list-prices","price":%d}]};</script>')
+
+
+class CountingChannel:
+    def __init__(self) -> None:
+        self.sent = 0
+
+    async def send(self, embed=None) -> None:
+        self.sent += 1
+
+
+async def run_replica(latency: float) -> dict:
+    """One replica: works through the due URLs, then sends notifications while it leads."""
+    from app.services.database import leader_lease, notification_outbox, close_database
+    from app.services.price_watcher import PriceWatcher
+    from app.services.scrapers import base_scraper
+    from app.services.scrapers.parse_pool import parse_pool
+
+    scraped = []
+
+    async def fetch(url):
+        scraped.append(url)
+        await asyncio.sleep(latency)
+        return 200, PAGE % 900
+
+    base_scraper.http_client.fetch = fetch
+    parse_pool.start()
+    channel = CountingChannel()
+    watcher = PriceWatcher(bot=None)
+    watcher.channel = channel
+
+    started = time.perf_counter()
+    await watcher.run_cycle()
+    elapsed = time.perf_counter() - started
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and await notification_outbox.pending():
+        if await leader_lease.acquire():
+            await notification_outbox.drain(lambda change: channel.send(embed=change.embed()))
+        await asyncio.sleep(0.2)
+    await leader_lease.release()
+    parse_pool.close()
+    await close_database()
+    return {"scraped": scraped, "sent": channel.sent, "seconds": elapsed}
+
+
+async def seed(urls: int) -> None:
+    from app.services.database import mongo, init_database, tracking_document
+    from app.services.scrapers.registry import registry
+
+    await mongo.client.drop_database(mongo.db.name)
+    label = registry.get("paris").labels["price1"]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    links = [f"https://www.paris.cl/bench-{i}.html" for i in range(urls)]
+    await mongo.urls.insert_many([tracking_document("Paris", url, now) for url in links])
+    # A previous price for every URL, so every scrape is a change to notify.
+    await mongo.info.insert_many([
+        {"prefix": "paris", "url": url, "timestamp": now - datetime.timedelta(days=1),
+         "product_name": "Bench", label: 1000} for url in links])
+    await init_database()
+
+
+async def drop() -> None:
+    from app.services.database import mongo, close_database
+    await mongo.client.drop_database(mongo.db.name)
+    await close_database()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--urls", type=int, default=300)
+    arg_parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--db", default="scraper_bench")
+    arg_parser.add_argument("--replica", action="store_true", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    # Set before app.config is imported, here and in every replica process.
+    os.environ.update({"MONGO_DB": args.db, "WATCHER_MODE": "distributed"})
+
+    if args.replica:
+        print(json.dumps(asyncio.run(run_replica(args.latency))))
+        return
+
+    for count in args.replicas:
+        asyncio.run(seed(args.urls))
+        started = time.perf_counter()
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.distributed_watch", "--replica",
+                 "--latency", str(args.latency), "--db", args.db],
+                env={**os.environ, "REPLICA_ID": f"bench-{count}-{i}"},
+                stdout=subprocess.PIPE, text=True)
+            for i in range(count)
+        ]
+        results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in processes]
+        elapsed = time.perf_counter() - started
+
+        scraped = [url for result in results for url in result["scraped"]]
+        cycle = max(result["seconds"] for result in results)
+        print(f"{count} replica(s): {len(set(scraped))}/{args.urls} URLs in {cycle:6.1f}s "
+              f"-> {len(scraped) / cycle * 60:7.1f} URLs/min, "
+              f"{len(scraped) - len(set(scraped))} scraped twice, "
+              f"{sum(r['sent'] for r in results)}/{args.urls} notifications sent "
+              f"({elapsed:.1f}s with process start-up)")
+    asyncio.run(drop())
+
+
+if __name__ == "__main__":
+    main()
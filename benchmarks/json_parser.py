@@ -0,0 +1,97 @@
+"""
+Microbenchmark for embedded-JSON extraction: the previous char-by-char brace
+scanner against JSONDecoder.raw_decode and the single-pass scan used by the
+scrapers.
+
+Usage:
+    python -m benchmarks.json_parser [PAGE.html ...] [--repeat 20]
+
+Without pages, a synthetic ~3 MB product page is generated.
+"""
+import argparse
+import json
+import timeit
+from app.utils.json_parser import decode_at, find_embedded_json
+
+
+def legacy_find_end_of_json(s: str, start_idx: int) -> int:
+    brace_count = 0
+    in_string = False
+    escape = False
+    for i, char in enumerate(s[start_idx:], start=start_idx):
+        if char == '"' and not escape:
+            in_string = not in_string
+        if not in_string:
+            if char == '{':
+                brace_count += 1
+            elif char == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    return i + 1
+        escape = (char == '\\' and not escape)
+    return -1
+
+
+def legacy_extract_product_json(html: str):
+    idx = html.find("window.productJSON =")
+    if idx == -1:
+        return None
+    start_idx = html.find("{", idx)
+    end_idx = legacy_find_end_of_json(html, start_idx)
+    if end_idx == -1:
+        return None
+    return json.loads(html[start_idx:end_idx])
+
+
+def extract_product_json(html: str):
+    idx = html.find("window.productJSON")
+    if idx == -1:
+        return None
+    start_idx = html.find("{", idx)
+    if start_idx == -1:
+        return None
+    value, _ = decode_at(html, start_idx)
+    return value
+
+
+def synthetic_page() -> str:
+    product = {
+        "name": "Smart TV 55\" 4K",
+        "prices": [{"priceBookId": f"clp-{i}-prices", "price": 100_000 + i} for i in range(3)],
+        "variants": [{"sku": f"SKU{i}", "description": "x" * 200, "attrs": {"k": list(range(20))}}
+                     for i in range(800)]
+    }
+    noise = "<div class='item'><p>lorem ipsum dolor sit amet</p></div>\n" * 30_000
+    ld = {"@type": "Product", "name": product["name"], "offers": [{"price": 100_000}]}
+    return (
+        f"<html><head><script type=\"application/ld+json\">{json.dumps(ld)}</script></head><body>"
+        f"{noise}<script>window.productJSON = {json.dumps(product)};</script>{noise}</body></html>"
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("pages", nargs="*")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    pages = [(path, open(path, encoding="utf-8").read()) for path in args.pages]
+    if not pages:
+        pages = [("synthetic", synthetic_page())]
+
+    for label, html in pages:
+        assert legacy_extract_product_json(html) == extract_product_json(html)
+        assert find_embedded_json(html, ["productJSON"]).window.get("productJSON") == extract_product_json(html)
+        runs = {
+            "legacy scanner": lambda: legacy_extract_product_json(html),
+            "raw_decode": lambda: extract_product_json(html),
+            "single-pass all markers": lambda: find_embedded_json(html),
+        }
+        print(f"{label}: {len(html) / 1_000_000:.1f} MB")
+        for name, func in runs.items():
+            seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            print(f"  {name:<24} {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Checks the distributed-mode leases against a real mongod: concurrent
+replicas never claim the same URL, an unrenewed URL lease is taken over once
+it expires while renewed ones are kept, and the leader lease is held by one
+replica at a time and fails over when the leader stops renewing it. Every
+replica gets its own client, so claims race at the server as they do across
+processes. Exits with status 1 at the first failed check.
+
+The checks write to a scratch database, which is dropped afterwards.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python -m benchmarks.lease_check \\
+        [--replicas 8] [--urls 200] [--ttl 2] [--db scraper_lease_check]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        print(f"FAIL {message}")
+        sys.exit(1)
+    print(f"ok   {message}")
+
+
+async def check_url_leases(leases: list, urls: list, ttl: float) -> None:
+    due = datetime.datetime.now(datetime.timezone.utc)
+    first, second, third = leases[:3]
+
+    started = time.monotonic()
+    claims = await asyncio.gather(*(lease.claim_due(due, len(urls)) for lease in leases))
+    # Leases older than the TTL may rightly be claimed again, which would read as double claims.
+    check(time.monotonic() - started < ttl, "every URL was claimed within the lease TTL (otherwise raise --ttl)")
+    keys = [doc["url_key"] for docs in claims for doc in docs]
+    check(len(keys) == len(set(keys)) == len(urls),
+          f"{len(leases)} concurrent replicas claimed {len(set(keys))}/{len(urls)} URLs, "
+          f"{len(keys) - len(set(keys))} twice")
+
+    held = [doc["url"] for doc in claims[0]]
+    taken = await second.claim_urls(held) if held else []
+    check(not taken, "claim_urls leaves URLs leased by another replica alone")
+    await asyncio.gather(*(lease.release([doc["url"] for doc in docs])
+                           for lease, docs in zip(leases, claims)))
+
+    # The first replica renews half of its 20 URLs; a third one holds and renews all the others.
+    docs = await first.claim_due(due, 20)
+    renewed, dropped = [doc["url"] for doc in docs[:10]], [doc["url"] for doc in docs[10:]]
+    rest = [doc["url"] for doc in await third.claim_due(due, len(urls))]
+    await asyncio.sleep(ttl * 0.6)
+    check(await first.renew(renewed) == len(renewed), "renew extends the leases still held")
+    await third.renew(rest)
+    await asyncio.sleep(ttl * 0.6)
+
+    await second.release(renewed)
+    taken = {doc["url"] for doc in await second.claim_due(due, len(urls))}
+    check(taken == set(dropped), f"only the {len(dropped)} expired leases were taken over by another replica")
+    check(await first.renew(dropped) == 0, "the replica that let its leases expire cannot renew them")
+
+
+async def check_leader_lease(leaders: list, ttl: float) -> None:
+    won = await asyncio.gather(*(leader.acquire() for leader in leaders))
+    check(won.count(True) == 1, f"{won.count(True)} of {len(leaders)} racing replicas became leader")
+    leader = leaders[won.index(True)]
+    followers = [other for other in leaders if other is not leader]
+
+    holder = await leader.holder()
+    check(holder["owner"] == leader.owner, "the lease document names the leader")
+    check(not any(await asyncio.gather(*(other.acquire() for other in followers))),
+          "followers cannot take a live leader lease")
+    check(await leader.acquire(), "the leader renews its own lease")
+
+    # The leader stops renewing, as if its process died.
+    await asyncio.sleep(ttl + 0.5)
+    check(not leader.is_leader, "a leader that stopped renewing no longer sees itself as leader")
+    won = await asyncio.gather(*(other.acquire() for other in followers))
+    check(won.count(True) == 1, "exactly one follower took over the expired leader lease")
+    successor = followers[won.index(True)]
+    check(not await leader.acquire(), "the old leader cannot take the lease back")
+
+    await successor.release()
+    others = [other for other in followers if other is not successor]
+    check(await others[0].acquire(), "a released leader lease is taken over right away")
+
+
+async def run(args) -> None:
+    from pymongo import AsyncMongoClient
+    from app.config import MONGO_URI, MONGO_LEASES_COLLECTION, MONGO_TRACKING_COLLECTION
+    from app.services.database import tracking_document
+    from app.services.leases import LeaderLease, UrlLeases
+
+    clients = [AsyncMongoClient(MONGO_URI, tz_aware=True) for _ in range(args.replicas)]
+    dbs = [client[args.db] for client in clients]
+    url_leases = [UrlLeases(lambda db=db: db[MONGO_TRACKING_COLLECTION], owner=f"check-{i}", ttl=args.ttl)
+                  for i, db in enumerate(dbs)]
+    leaders = [LeaderLease(lambda db=db: db[MONGO_LEASES_COLLECTION], owner=f"check-{i}", ttl=args.ttl)
+               for i, db in enumerate(dbs)]
+    try:
+        await clients[0].drop_database(args.db)
+        await url_leases[0].ensure_indexes()
+        added_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)
+        urls = [f"https://www.paris.cl/lease-{i}.html" for i in range(args.urls)]
+        await dbs[0][MONGO_TRACKING_COLLECTION].insert_many(
+            [tracking_document("Paris", url, added_at) for url in urls])
+
+        await check_url_leases(url_leases, urls, args.ttl)
+        await check_leader_lease(leaders, args.ttl)
+    finally:
+        await clients[0].drop_database(args.db)
+        for client in clients:
+            await client.close()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--replicas", type=int, default=8)
+    arg_parser.add_argument("--urls", type=int, default=200)
+    arg_parser.add_argument("--ttl", type=float, default=2.0)
+    arg_parser.add_argument("--db", default="scraper_lease_check")
+    args = arg_parser.parse_args()
+    if args.replicas < 3 or args.urls < 20:
+        arg_parser.error("the checks need at least 3 replicas and 20 URLs")
+
+    # Set before app.config is imported.
+    os.environ.update({"MONGO_DB": args.db, "WATCHER_MODE": "distributed"})
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
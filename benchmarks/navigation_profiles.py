@@ -0,0 +1,49 @@
+"""
+Reports bytes transferred and load time per page with a full `load`
+navigation against each site spec's navigation profile.
+
+Usage:
+    python -m benchmarks.navigation_profiles URL [URL ...]
+"""
+import argparse
+import asyncio
+import time
+from app.services.scrapers.browser_pool import BrowserPool
+from app.services.scrapers.navigation import NavigationProfile
+from app.services.scrapers.registry import registry
+
+
+async def load(pool: BrowserPool, url: str, profile: NavigationProfile):
+    started = time.perf_counter()
+    async with pool.page() as page:
+        traffic = await profile.prepare(page)
+        await page.goto(url, wait_until=profile.wait_until, timeout=profile.timeout)
+        await profile.wait_until_ready(page)
+        await page.content()
+    return traffic, time.perf_counter() - started
+
+
+async def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("urls", nargs="+")
+    args = arg_parser.parse_args()
+
+    pool = BrowserPool(size=1)
+    await pool.start()
+    baseline = NavigationProfile.unrestricted()
+
+    for url in args.urls:
+        scraper = registry.for_url(url)
+        profile = scraper.navigation_profile if scraper else NavigationProfile()
+        before, before_s = await load(pool, url, baseline)
+        after, after_s = await load(pool, url, profile)
+        print(url)
+        print(f"  before: {before.bytes / 1024:8.1f} KiB {before.requests:4d} requests {before_s:5.1f}s")
+        print(f"  after:  {after.bytes / 1024:8.1f} KiB {after.requests:4d} requests "
+              f"{after_s:5.1f}s ({after.blocked} blocked)")
+
+    await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())